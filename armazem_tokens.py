@@ -0,0 +1,174 @@
+import os
+import numpy as np
+
+# formato em disco (dentro da pasta dos dados limpos):
+#   vocabulario.txt     um token por linha; o id é o número da linha (a partir de 0)
+#   tokens_ids.i32      ids de todos os posts concatenados (int32)
+#   tokens_offsets.i64  n_posts + 1 offsets (int64): tokens do post i = ids[off[i]:off[i+1]]
+PASTA_ARMAZEM = "armazem_tokens"
+ARQ_VOCAB = "vocabulario.txt"
+ARQ_IDS = "tokens_ids.i32"
+ARQ_OFFSETS = "tokens_offsets.i64"
+
+
+def caminho_armazem(pasta: str) -> str:
+    return os.path.join(pasta, PASTA_ARMAZEM)
+
+
+def armazem_existe(pasta: str) -> bool:
+    destino = caminho_armazem(pasta)
+    return all(os.path.exists(os.path.join(destino, a)) for a in (ARQ_VOCAB, ARQ_IDS, ARQ_OFFSETS))
+
+
+def _ler_vocab(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return f.read().split("\n")[:-1]
+
+
+def _mapear(path: str, dtype) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class ArmazemTokens:
+    # primeira: posição de cada id na ordem de 1ª ocorrência dos termos (None = a ordem dos
+    # próprios ids, que é a do vocabulário gravado); sobrevive a renumerações do vocabulário
+    def __init__(self, vocab: list[str], ids: np.ndarray, offsets: np.ndarray, primeira: np.ndarray | None = None):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self.primeira = primeira
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def posts(self) -> np.ndarray:
+        # índice do post de cada posição de ids
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+
+    def ordem_primeira(self) -> np.ndarray:
+        return np.arange(len(self.vocab), dtype=np.int64) if self.primeira is None else self.primeira
+
+    def tokens_do_post(self, i: int) -> list[str]:
+        return [self.vocab[t] for t in self.ids[self.offsets[i]:self.offsets[i + 1]]]
+
+    def filtrar(self, mascara: np.ndarray) -> "ArmazemTokens":
+        # mantém só os ids com mascara[id] (mesmo vocabulário e mesmos posts, na mesma ordem)
+        manter = mascara[self.ids]
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.posts()[manter], minlength=len(self)), out=offsets[1:])
+        return ArmazemTokens(self.vocab, np.asarray(self.ids)[manter], offsets, self.primeira)
+
+
+def _codificar_em(vocab: dict, listas_tokens) -> tuple[np.ndarray, np.ndarray]:
+    ids = []
+    tamanhos = []
+    for toks in listas_tokens:
+        ids.extend(vocab.setdefault(t, len(vocab)) for t in toks)
+        tamanhos.append(len(toks))
+    return np.asarray(ids, dtype=np.int32), np.asarray(tamanhos, dtype=np.int64)
+
+
+def codificar(listas_tokens) -> ArmazemTokens:
+    vocab = {}
+    ids, tamanhos = _codificar_em(vocab, listas_tokens)
+    offsets = np.zeros(len(tamanhos) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=offsets[1:])
+    return ArmazemTokens(list(vocab), ids, offsets)
+
+
+def carregar_armazem(pasta: str, com_vocab: bool = True) -> ArmazemTokens:
+    # com_vocab=False deixa vocab = None: os termos necessários saem de ler_termos
+    destino = caminho_armazem(pasta)
+    if not armazem_existe(pasta):
+        raise FileNotFoundError(f"Não encontrei o armazém de tokens em: {destino}")
+    return ArmazemTokens(
+        _ler_vocab(os.path.join(destino, ARQ_VOCAB)) if com_vocab else None,
+        _mapear(os.path.join(destino, ARQ_IDS), np.int32),
+        _mapear(os.path.join(destino, ARQ_OFFSETS), np.int64),
+    )
+
+
+def ler_termos(pasta: str, ids) -> list[str]:
+    # só as linhas pedidas do vocabulário, lendo o arquivo em fluxo
+    posicoes = {}
+    for k, i in enumerate(ids):
+        posicoes.setdefault(int(i), []).append(k)
+    termos = [None] * sum(len(p) for p in posicoes.values())
+    ultimo = max(posicoes, default=-1)
+    with open(os.path.join(caminho_armazem(pasta), ARQ_VOCAB), encoding="utf-8", newline="\n") as f:
+        for n, linha in enumerate(f):
+            if n > ultimo or not linha.endswith("\n"):
+                break
+            for k in posicoes.get(n, ()):
+                termos[k] = linha[:-1]
+    if any(t is None for t in termos):
+        raise ValueError("id fora do vocabulário do armazém de tokens")
+    return termos
+
+
+def _gravar(f, dados: bytes):
+    f.write(dados)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _truncar(path: str, tamanho: int):
+    if os.path.getsize(path) > tamanho:
+        with open(path, "r+b") as f:
+            f.truncate(tamanho)
+
+
+class EscritorArmazemTokens:
+    # a cada lote grava vocabulário, ids e offsets nessa ordem, cada um já no disco antes do
+    # próximo: os offsets é que confirmam o lote, e todo id confirmado já tem sua linha no
+    # vocabulário. Ao anexar, sobras de um lote interrompido (ids além do último offset, linha
+    # de vocabulário pela metade) são cortadas; tokens a mais no vocabulário não atrapalham.
+    def __init__(self, pasta: str, anexar: bool = False):
+        destino = caminho_armazem(pasta)
+        os.makedirs(destino, exist_ok=True)
+        vocab_path = os.path.join(destino, ARQ_VOCAB)
+        ids_path = os.path.join(destino, ARQ_IDS)
+        offsets_path = os.path.join(destino, ARQ_OFFSETS)
+
+        if anexar and armazem_existe(pasta):
+            _truncar(offsets_path, os.path.getsize(offsets_path) // 8 * 8)
+            offsets = _mapear(offsets_path, np.int64)
+            self._total = int(offsets[-1]) if len(offsets) else 0
+            del offsets
+            _truncar(ids_path, self._total * 4)
+            with open(vocab_path, "rb") as f:
+                conteudo = f.read()
+            _truncar(vocab_path, conteudo.rfind(b"\n") + 1)
+            self._vocab = {t: i for i, t in enumerate(_ler_vocab(vocab_path))}
+            self._arq_vocab = open(vocab_path, "ab")
+            self._ids = open(ids_path, "ab")
+            self._offsets = open(offsets_path, "ab")
+            if os.path.getsize(offsets_path) == 0:
+                _gravar(self._offsets, np.zeros(1, dtype=np.int64).tobytes())
+        else:
+            self._vocab = {}
+            self._total = 0
+            self._arq_vocab = open(vocab_path, "wb")
+            self._ids = open(ids_path, "wb")
+            self._offsets = open(offsets_path, "wb")
+            _gravar(self._offsets, np.zeros(1, dtype=np.int64).tobytes())
+        self._n_vocab_gravado = len(self._vocab)
+
+    def adicionar(self, listas_tokens):
+        ids, tamanhos = _codificar_em(self._vocab, listas_tokens)
+        novos = list(self._vocab)[self._n_vocab_gravado:]
+        if novos:
+            _gravar(self._arq_vocab, "".join(t + "\n" for t in novos).encode("utf-8"))
+            self._n_vocab_gravado = len(self._vocab)
+        offsets = self._total + np.cumsum(tamanhos)
+        _gravar(self._ids, ids.tobytes())
+        _gravar(self._offsets, offsets.tobytes())
+        if len(offsets):
+            self._total = int(offsets[-1])
+
+    def fechar(self):
+        self._arq_vocab.close()
+        self._ids.close()
+        self._offsets.close()
@@ -0,0 +1,88 @@
+import statistics
+import numpy as np
+import pandas as pd
+
+# Backbone de redes ponderadas não direcionadas, calculado sobre a tabela de arestas inteira.
+# Os rede_*.py chamam filtrar_backbone antes de exportar quando APLICAR_BACKBONE = True, com
+# METODO_BACKBONE ("disparidade" ou "ruido") e ALPHA_BACKBONE como nível de significância.
+#
+# "disparidade" (Serrano, Boguñá e Vespignani, 2009): para o nó i com força s_i e grau k_i,
+#   a aresta (i, j) tem alfa_ij = (1 - w_ij / s_i)^(k_i - 1), a chance de um peso tão concentrado
+#   se a força de i fosse dividida ao acaso entre as k_i arestas. A aresta fica se for
+#   significativa (alfa < ALPHA) para pelo menos uma das pontas. Nó de grau 1 não decide nada.
+#
+# "ruido" (Coscia e Neffke, 2017): compara w_ij com o esperado s_i * s_j / N e guarda a aresta
+#   se o escore passa de z(1 - ALPHA) desvios-padrão da estimativa. Espera pesos que sejam contagens.
+
+METODOS_BACKBONE = ("disparidade", "ruido")
+
+
+def _indices_nos(edges: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, int]:
+    codigos, _ = pd.factorize(pd.concat([edges["Source"], edges["Target"]], ignore_index=True))
+    n = len(edges)
+    return codigos[:n], codigos[n:], int(codigos.max()) + 1 if n else 0
+
+
+def alfa_disparidade(edges: pd.DataFrame, coluna: str = "Weight") -> np.ndarray:
+    # menor alfa entre as duas pontas de cada aresta
+    u, v, n_nos = _indices_nos(edges)
+    w = edges[coluna].to_numpy(dtype=np.float64)
+    forca = np.bincount(u, weights=w, minlength=n_nos) + np.bincount(v, weights=w, minlength=n_nos)
+    grau = np.bincount(u, minlength=n_nos) + np.bincount(v, minlength=n_nos)
+
+    def alfa(i):
+        k = grau[i]
+        a = np.power(1.0 - w / forca[i], k - 1)
+        return np.where(k > 1, a, 1.0)
+
+    return np.minimum(alfa(u), alfa(v))
+
+
+def escore_ruido(edges: pd.DataFrame, coluna: str = "Weight") -> tuple[np.ndarray, np.ndarray]:
+    """(escore, desvio-padrão do escore) de cada aresta, com a tabela simétrica (n = 2 * soma dos pesos).
+
+    Segue o código de referência de Coscia e Neffke: escore (kappa * nij - 1) / (kappa * nij + 1) com
+    kappa = n / (ni * nj). A variância do prior de P(ij) é a da hipergeométrica simplificada,
+    ni * nj * (n - ni) * (n - nj) / (n**4 * (n - 1)); o beta com essa média e variância é atualizado
+    com nij, e a variância de nij é a binomial n * p * (1 - p) na média do posterior, levada ao
+    escore pelo método delta.
+    """
+    u, v, n_nos = _indices_nos(edges)
+    nij = edges[coluna].to_numpy(dtype=np.float64)
+    forca = np.bincount(u, weights=nij, minlength=n_nos) + np.bincount(v, weights=nij, minlength=n_nos)
+    ni, nj = forca[u], forca[v]
+    n = 2.0 * nij.sum()
+
+    kappa = n / (ni * nj)
+    escore = (kappa * nij - 1) / (kappa * nij + 1)
+
+    # prior beta para P(ij) com média e variância da hipergeométrica; posterior com a contagem observada
+    media = ni * nj / (n * n)
+    variancia = ni * nj * (n - ni) * (n - nj) / (n ** 4 * (n - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alfa_prior = media ** 2 / variancia * (1 - media) - media
+        beta_prior = media / variancia * (1 - media ** 2) - (1 - media)
+        alfa_post = alfa_prior + nij
+        beta_post = n - nij + beta_prior
+        p_esperado = alfa_post / (alfa_post + beta_post)
+        var_nij = p_esperado * (1 - p_esperado) * n
+        d = 1.0 / (ni * nj) - n * (ni + nj) / (ni * nj) ** 2
+        var_escore = var_nij * (2 * (kappa + nij * d) / (kappa * nij + 1) ** 2) ** 2
+    return escore, np.sqrt(np.nan_to_num(var_escore, nan=np.inf, posinf=np.inf))
+
+
+def filtrar_backbone(edges: pd.DataFrame, metodo: str, alpha: float, coluna: str = "Weight") -> pd.DataFrame:
+    if metodo not in METODOS_BACKBONE:
+        raise ValueError(f"METODO_BACKBONE desconhecido: {metodo} (opções: {', '.join(METODOS_BACKBONE)})")
+    if edges.empty:
+        return edges
+
+    if metodo == "disparidade":
+        manter = alfa_disparidade(edges, coluna) < alpha
+    else:
+        escore, desvio = escore_ruido(edges, coluna)
+        manter = escore - statistics.NormalDist().inv_cdf(1 - alpha) * desvio > 0
+
+    filtradas = edges[manter]
+    print(f"[INFO] Backbone ({metodo}, alpha={alpha}): {len(edges)} -> {len(filtradas)} arestas")
+    return filtradas
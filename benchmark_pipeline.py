@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+import limpeza_preparacao_dataset as limpeza
+from armazem_tokens import codificar
+
+ARQUIVO_POSTS = "posts-bbb26.csv"
+
+FATOR_ESCALA = 200      # replica o CSV de exemplo N vezes
+REPETICOES = 3
+AUTORES_SINTETICOS = 4000   # benchmark de similaridade autor x autor
+NOS_GRAFO_SINTETICO = 1000  # benchmark dos backends de métricas de grafo
+NOS_NOVOS_LAYOUT = 20       # nós acrescentados entre as duas coletas no benchmark de layout
+TETO_ITER_LAYOUT = 2500
+WORKERS_PARALELO = (1, 2, 4, 8)   # limitados a os.cpu_count() no benchmark de escala
+
+# casos de borda em que limpar_lote e clean_text precisam dar o mesmo resultado
+TEXTOS_BORDA = [
+    "HTTPS://Exemplo.COM/x?y=1 oi", "Www.Exemplo.com.br tchau", "hTtP://a.b/c#frag #tag",
+    "hww.example.com oi", "wttp://foo bar", "xhttp://a.b d", "awww.site.com e", "http:/quase.url f",
+    "http://", "www.", "fim com url http://a.b", "", " ", "\t\n  ", None, float("nan"), 123,
+    "Ação É ÓTIMA!!! çãõ", "İstanbul ǅemal ß ẞ", "emoji 😀👍🏽 ok", "中文 テキスト 한국어",
+    "nbsp\u00a0aqui\u2003em\u2028linha", "@Fulano.bsky.social #BBB26 #Rede_BBB",
+    "trending words: a, b", "kkkkk... rs!!! 100% #1", "http://ação.com/ç ok", "WWW.ÇÃO.COM ok",
+]
+# com o separador do lote dentro do texto, limpar_lote cai no clean_text do lote todo: conferidos à parte
+TEXTOS_COM_SEPARADOR = ["http://a.b\x1ehttp://c.d", "a\x1eb\x1e\x1ec", "\x1e", "hww.x\x1eWWW.y z"]
+
+
+def cronometrar(fn, *args):
+    melhor = None
+    resultado = None
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        resultado = fn(*args)
+        dt = time.perf_counter() - t0
+        melhor = dt if melhor is None else min(melhor, dt)
+    return resultado, melhor
+
+
+def carregar_posts_escalados(script_dir: str) -> pd.DataFrame:
+    df = limpeza.ler_entrada(os.path.join(script_dir, ARQUIVO_POSTS))
+    return pd.concat([df] * FATOR_ESCALA, ignore_index=True)
+
+
+def conferir_bordas_limpeza():
+    # cada caso sozinho, todos num lote só e espalhados num lote maior (vizinhos pelo separador)
+    misturado = TEXTOS_BORDA * 3 + ["texto comum"] * 10
+    misturado = [misturado[i] for i in np.random.default_rng(7).permutation(len(misturado))]
+    lotes = [[t] for t in TEXTOS_BORDA + TEXTOS_COM_SEPARADOR] + [TEXTOS_BORDA, misturado, TEXTOS_COM_SEPARADOR]
+    for lote in lotes:
+        textos = pd.Series(lote, dtype=object)
+        esperado = textos.apply(limpeza.clean_text).tolist()
+        obtido = limpeza.limpar_lote(textos).tolist()
+        for texto, a, b in zip(lote, esperado, obtido):
+            if a != b:
+                raise AssertionError(f"limpar_lote diverge de clean_text em {texto!r}: {b!r} != {a!r}")
+        if textos.apply(limpeza.tokenizar).tolist() != limpeza.tokenizar_lote(textos).tolist():
+            raise AssertionError(f"tokenizar_lote diverge de tokenizar em {lote!r}")
+
+
+def bench_limpeza(script_dir: str):
+    conferir_bordas_limpeza()
+    df = carregar_posts_escalados(script_dir)
+    textos = df["text"].astype(str)
+
+    limpo_py, t_limpa_py = cronometrar(lambda s: s.apply(limpeza.clean_text), textos)
+    limpo_vet, t_limpa_vet = cronometrar(limpeza.limpar_lote, textos)
+    if limpo_py.tolist() != limpo_vet.tolist():
+        raise AssertionError("limpar_lote diverge de clean_text")
+
+    tok_py, t_tok_py = cronometrar(lambda s: s.apply(limpeza.tokenizar), limpo_py)
+    tok_vet, t_tok_vet = cronometrar(limpeza.tokenizar_lote, limpo_py)
+    if tok_py.tolist() != tok_vet.tolist():
+        raise AssertionError("tokenizar_lote diverge de tokenizar")
+
+    print(f"[BENCH] limpeza ({len(textos)} posts, melhor de {REPETICOES})")
+    print(f"     clean_text:  python {t_limpa_py:.3f}s | vetorizado {t_limpa_vet:.3f}s | {t_limpa_py / t_limpa_vet:.2f}x")
+    print(f"     tokenizar:   python {t_tok_py:.3f}s | vetorizado {t_tok_vet:.3f}s | {t_tok_py / t_tok_vet:.2f}x")
+
+
+def bench_paralelo(script_dir: str):
+    df = carregar_posts_escalados(script_dir)
+    config = limpeza.config_limpeza()
+    ref, t_seq = cronometrar(lambda d: limpeza.preparar_df(d.copy(), config), df)
+
+    n_cpus = os.cpu_count() or 1
+    print(f"[BENCH] paralelo ({len(df)} posts, {n_cpus} CPUs, melhor de {REPETICOES})")
+    print(f"     sequencial: {t_seq:.3f}s")
+    for n in sorted({w for w in WORKERS_PARALELO if w <= n_cpus} | {2}):
+        pool = limpeza.criar_pool(n)
+        try:
+            n_shards = n * limpeza.SHARDS_POR_WORKER
+            saida, t = cronometrar(lambda d: limpeza.preparar_em_paralelo(d.copy(), pool, n_shards, config), df)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if not saida.equals(ref):
+            raise AssertionError(f"preparar_em_paralelo com {n} workers diverge do sequencial")
+        extra = " (mais workers que CPUs: mede só o custo do pool)" if n > n_cpus else ""
+        print(f"     {n} workers: {t:.3f}s | {t_seq / t:.2f}x{extra}")
+
+
+def bench_coocorrencia(script_dir: str):
+    import rede_hashtag_hashtag
+    import rede_palavra_palavra
+
+    df = limpeza.preparar_df(carregar_posts_escalados(script_dir))
+    tokens = codificar(df["tokens"])
+
+    pal_counter, t_pal_counter = cronometrar(rede_palavra_palavra.contar_counter, tokens)
+    pal_esparso, t_pal_esparso = cronometrar(rede_palavra_palavra.contar_esparso, tokens)
+    if pal_counter != pal_esparso:
+        raise AssertionError("contar_esparso diverge de contar_counter (palavras)")
+
+    tags = df["hashtags"].tolist()
+    tag_counter, t_tag_counter = cronometrar(rede_hashtag_hashtag.contar_counter, tags)
+    tag_esparso, t_tag_esparso = cronometrar(rede_hashtag_hashtag.contar_esparso, tags)
+    if tag_counter != tag_esparso:
+        raise AssertionError("contar_esparso diverge de contar_counter (hashtags)")
+
+    print(f"[BENCH] coocorrencia ({len(df)} posts, melhor de {REPETICOES})")
+    print(f"     palavras:  counter {t_pal_counter:.3f}s | esparso {t_pal_esparso:.3f}s | {t_pal_counter / t_pal_esparso:.2f}x")
+    print(f"     hashtags:  counter {t_tag_counter:.3f}s | esparso {t_tag_esparso:.3f}s | {t_tag_counter / t_tag_esparso:.2f}x")
+
+
+def bench_autor_hashtag(script_dir: str):
+    import rede_autor_hashtag
+
+    df = limpeza.preparar_df(carregar_posts_escalados(script_dir))
+    # autores distintos por réplica, para o número de autores crescer com o volume
+    df["author_handle"] = df["author_handle"] + "#" + (df.index // (len(df) // FATOR_ESCALA)).astype(str)
+    df = df[["author_handle", "hashtags"]]
+
+    por_linha, t_linha = cronometrar(rede_autor_hashtag.contar_iterrows, df)
+    vetorizado, t_vet = cronometrar(rede_autor_hashtag.contar_vetorizado, df)
+    if por_linha != vetorizado:
+        raise AssertionError("contar_vetorizado diverge de contar_iterrows")
+
+    print(f"[BENCH] autor_hashtag ({len(df)} posts, melhor de {REPETICOES})")
+    print(f"     contagem:  iterrows {t_linha:.3f}s | vetorizado {t_vet:.3f}s | {t_linha / t_vet:.2f}x")
+
+
+def autores_sinteticos(n: int, seed: int = 7) -> dict:
+    # autores agrupados em temas: cada um sorteia hashtags (Zipf) do seu tema;
+    # pares do mesmo tema têm Jaccard alto e o resto fica perto de zero, como nos dados reais
+    rng = np.random.default_rng(seed)
+    n_temas, tags_por_tema = max(1, n // 40), 60
+    pesos = 1.0 / np.arange(1, tags_por_tema + 1)
+    pesos /= pesos.sum()
+
+    conjuntos = {}
+    for i in range(n):
+        tema = rng.integers(n_temas)
+        k = int(rng.integers(3, 25))
+        tags = rng.choice(tags_por_tema, size=k, p=pesos)
+        s = {f"#t{tema}_{t}" for t in tags}
+        if len(s) >= 2:
+            conjuntos[f"autor{i:06d}"] = s
+    return conjuntos
+
+
+def bench_autores(script_dir: str):
+    import rede_autor_autor
+
+    hashtags_por_autor = autores_sinteticos(AUTORES_SINTETICOS)
+    autores = sorted(hashtags_por_autor)
+
+    exato, t_exato = cronometrar(rede_autor_autor.arestas_autores, autores, hashtags_por_autor, "exato")
+    indice, t_indice = cronometrar(rede_autor_autor.arestas_autores, autores, hashtags_por_autor, "indice")
+    if indice != exato:
+        raise AssertionError("modo indice diverge do modo exato")
+    aprox, t_aprox = cronometrar(rede_autor_autor.arestas_autores, autores, hashtags_por_autor, "minhash")
+
+    pares_exato = {(e["Source"], e["Target"]) for e in exato}
+    pares_aprox = {(e["Source"], e["Target"]) for e in aprox}
+    if not pares_aprox <= pares_exato:
+        raise AssertionError("modo minhash gerou aresta que o modo exato não gera")
+    recall = len(pares_aprox) / len(pares_exato) if pares_exato else 1.0
+    n_cand = sum(1 for _ in rede_autor_autor.pares_minhash(autores, hashtags_por_autor))
+    n_todos = len(autores) * (len(autores) - 1) // 2
+
+    print(f"[BENCH] autores ({len(autores)} autores sintéticos, MIN_JACCARD={rede_autor_autor.MIN_JACCARD}, melhor de {REPETICOES})")
+    print(f"     exato:   {t_exato:.3f}s | {n_todos} pares avaliados | {len(pares_exato)} arestas")
+    print(f"     indice:  {t_indice:.3f}s | {len(indice)} arestas (idênticas ao exato) | {t_exato / t_indice:.2f}x")
+    print(f"     minhash: {t_aprox:.3f}s | {n_cand} candidatos | {len(pares_aprox)} arestas | recall {recall:.4f}")
+
+
+def grafo_sintetico(n: int, seed: int = 7):
+    # preferential attachment com pesos inteiros de cauda longa, parecido com as redes de coocorrência
+    import networkx as nx
+
+    G = nx.barabasi_albert_graph(n, 3, seed=seed)
+    rng = np.random.default_rng(seed)
+    for (u, v), w in zip(G.edges(), rng.zipf(2.0, G.number_of_edges())):
+        G[u][v]["weight"] = int(min(w, 50))
+    return nx.relabel_nodes(G, {i: f"n{i:06d}" for i in G})
+
+
+def bench_metricas(script_dir: str):
+    import metricas_grafo
+
+    G = grafo_sintetico(NOS_GRAFO_SINTETICO)
+    ref_graus = metricas_grafo.graus(G, "networkx")
+    ref_betw = None
+
+    print(f"[BENCH] metricas ({G.number_of_nodes()} nós, {G.number_of_edges()} arestas, melhor de {REPETICOES})")
+    for backend in metricas_grafo.BACKENDS:
+        if not metricas_grafo.backend_disponivel(backend):
+            print(f"     {backend:<9} não instalado")
+            continue
+        graus, t_graus = cronometrar(metricas_grafo.graus, G, backend)
+        if graus != ref_graus:
+            raise AssertionError(f"graus do backend {backend} divergem do networkx")
+        (betw, modo), t_betw = cronometrar(metricas_grafo.betweenness, G, "exato", None, 0.05, 0.1, 7, 1, backend)
+        ref_betw = ref_betw or betw
+        erro = max(abs(betw[n] - ref_betw[n]) for n in G)
+        (part, metodo), t_com = cronometrar(metricas_grafo.comunidades, G, backend)
+        print(f"     {backend:<9} graus {t_graus:.3f}s | betweenness {t_betw:.3f}s ({modo}, dif. máx {erro:.1e})"
+              f" | comunidades {t_com:.3f}s ({metodo}, {len(set(part.values()))} classes)")
+
+
+def bench_layout(script_dir: str):
+    # layout do zero x partindo do cache, na mesma rede depois de uma coleta nova
+    import networkx as nx
+    import layout_grafo
+    from forceatlas2 import ForceAtlas2
+    from gerar_grafo_palavra_palavra_sem_genericas import FA2_PARAMS, SEED_LAYOUT
+
+    def rodar(G, pos):
+        fa2 = ForceAtlas2(seed=SEED_LAYOUT, **FA2_PARAMS)
+        t0 = time.perf_counter()
+        pos = fa2.forceatlas2_networkx_layout(G, pos=pos, iterations=TETO_ITER_LAYOUT)
+        return pos, fa2.iteracoes, time.perf_counter() - t0
+
+    G = grafo_sintetico(NOS_GRAFO_SINTETICO)
+    anteriores, _, _ = rodar(G, None)
+
+    # coleta seguinte: nós novos ligados por preferential attachment aos que já existiam
+    rng = np.random.default_rng(7)
+    novo = nx.Graph(G)
+    nos = list(G)
+    grau = np.array([G.degree(n) for n in nos], dtype=np.float64)
+    for k in range(NOS_NOVOS_LAYOUT):
+        for alvo in rng.choice(len(nos), size=3, replace=False, p=grau / grau.sum()):
+            novo.add_edge(f"novo{k:04d}", nos[alvo], weight=1)
+
+    _, it_frio, t_frio = rodar(novo, None)
+    _, it_quente, t_quente = rodar(novo, layout_grafo.posicoes_iniciais(novo, anteriores, SEED_LAYOUT))
+    print(f"[BENCH] layout ({novo.number_of_nodes()} nós, {NOS_NOVOS_LAYOUT} novos, teto {TETO_ITER_LAYOUT} iterações)")
+    print(f"     do zero:    {it_frio} iterações | {t_frio:.2f}s")
+    print(f"     com cache:  {it_quente} iterações | {t_quente:.2f}s | {t_frio / t_quente:.2f}x")
+
+
+BENCHMARKS = {
+    "limpeza": bench_limpeza,
+    "paralelo": bench_paralelo,
+    "coocorrencia": bench_coocorrencia,
+    "autor_hashtag": bench_autor_hashtag,
+    "autores": bench_autores,
+    "metricas": bench_metricas,
+    "layout": bench_layout,
+}
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        if nome not in BENCHMARKS:
+            raise ValueError(f"Benchmark desconhecido: {nome} (opções: {', '.join(BENCHMARKS)})")
+        BENCHMARKS[nome](script_dir)
+
+
+if __name__ == "__main__":
+    main()
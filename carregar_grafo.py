@@ -0,0 +1,176 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+# Monta o nx.Graph dos CSVs de nós/arestas de uma vez (add_nodes_from / add_edges_from), com
+# o mesmo resultado do laço por linha dos gerar_grafo_*: nós na ordem do CSV, depois os que só
+# aparecem nas arestas (na ordem da primeira aparição); aresta repetida fica com o último peso.
+#
+# Cache binário "<nodes>.grafo.npz" ao lado do CSV de nós: índice dos nós + arestas como pares de
+# índices int32 na ordem de inserção (refazer o grafo nessa ordem reproduz a mesma iteração de
+# nós e vizinhos), válido enquanto o hash do conteúdo dos dois CSVs e das opções for o mesmo.
+
+USAR_CACHE_GRAFO = True
+VERSAO_CACHE = 1
+
+
+def hash_entradas(caminhos: list[str], opcoes: tuple) -> str:
+    h = hashlib.blake2b(repr((VERSAO_CACHE, opcoes)).encode("utf-8"), digest_size=16)
+    for caminho in caminhos:
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def caminho_cache(nodes_path: str) -> str:
+    base, _ = os.path.splitext(nodes_path)
+    return base + ".grafo.npz"
+
+
+def _pesos(coluna: pd.Series, tipo_peso: str, peso_ausente) -> list:
+    if tipo_peso == "auto":
+        # no modo janela com PESO_POR_DISTANCIA os pesos são fracionários
+        tipo_peso = "int" if pd.api.types.is_integer_dtype(coluna) else "float"
+    if tipo_peso == "int":
+        # int() trunca, como no laço antigo
+        valores = np.trunc(coluna.to_numpy(dtype=np.float64, na_value=np.nan))
+        ausentes = np.isnan(valores)
+        valores = np.where(ausentes, 0, valores).astype(np.int64).tolist()
+    else:
+        valores = coluna.to_numpy(dtype=np.float64, na_value=np.nan)
+        ausentes = np.isnan(valores)
+        valores = valores.tolist()
+    return [peso_ausente if a else v for v, a in zip(valores, ausentes.tolist())]
+
+
+def _montar(nodes: pd.DataFrame, edges: pd.DataFrame, tipo_peso: str, peso_ausente,
+            tipos_novos: tuple[str, str] | None) -> tuple[list, list, list | None, np.ndarray, np.ndarray, list]:
+    # (nós, frequências, tipos, origem, destino, pesos): índices na lista de nós, na ordem de inserção
+    ids_csv = nodes["Id"].tolist()
+    if "Frequency" in nodes.columns:
+        freq_csv = nodes["Frequency"].fillna(0).to_numpy(dtype=np.float64).astype(np.int64).tolist()
+    else:
+        freq_csv = [0] * len(ids_csv)
+    tipos_csv = nodes["Type"].tolist() if tipos_novos is not None else None
+
+    # add_node repetido mantém a posição da primeira vez e os atributos da última
+    posicao = {}
+    for i, n in enumerate(ids_csv):
+        posicao.setdefault(n, len(posicao))
+    nos = list(posicao)
+    frequencias = [0] * len(nos)
+    tipos = [None] * len(nos) if tipos_novos is not None else None
+    for i, n in enumerate(ids_csv):
+        frequencias[posicao[n]] = freq_csv[i]
+        if tipos is not None:
+            tipos[posicao[n]] = tipos_csv[i]
+
+    # pontas fora da tabela de nós entram na ordem u0, v0, u1, v1, ... (Source vira o
+    # primeiro tipo de tipos_novos, Target o segundo)
+    origens, destinos = edges["Source"].tolist(), edges["Target"].tolist()
+    intercaladas = [x for par in zip(origens, destinos) for x in par]
+    for j, n in enumerate(intercaladas):
+        if n not in posicao:
+            posicao[n] = len(nos)
+            nos.append(n)
+            frequencias.append(0)
+            if tipos is not None:
+                tipos.append(tipos_novos[j % 2])
+
+    pesos = _pesos(edges["Weight"], tipo_peso, peso_ausente)
+    origem = np.fromiter((posicao[n] for n in origens), dtype=np.int64, count=len(origens))
+    destino = np.fromiter((posicao[n] for n in destinos), dtype=np.int64, count=len(destinos))
+    return nos, frequencias, tipos, origem, destino, pesos
+
+
+def _grafo(nos: list, frequencias: list, tipos: list | None, origem, destino, pesos: list) -> nx.Graph:
+    G = nx.Graph()
+    if tipos is None:
+        G.add_nodes_from((n, {"frequency": f}) for n, f in zip(nos, frequencias))
+    else:
+        G.add_nodes_from((n, {"node_type": t, "frequency": f}) for n, t, f in zip(nos, tipos, frequencias))
+    G.add_edges_from(
+        (nos[u], nos[v], {"weight": w}) for u, v, w in zip(origem.tolist(), destino.tolist(), pesos)
+    )
+    return G
+
+
+def _gravar_cache(caminho: str, chave: str, nos, frequencias, tipos, origem, destino, pesos):
+    # só ids (e tipos) de texto vão para o cache (um Id lido como NaN/número não volta igual de um array unicode)
+    if not all(isinstance(n, str) for n in nos) or (tipos is not None and not all(isinstance(t, str) for t in tipos)):
+        return
+    # arestas repetidas: a primeira posição com o último peso, como o add_edge
+    chaves = np.minimum(origem, destino) * max(len(nos), 1) + np.maximum(origem, destino)
+    _, primeira = np.unique(chaves, return_index=True)
+    _, do_fim = np.unique(chaves[::-1], return_index=True)
+    ultimo = len(chaves) - 1 - do_fim
+    ordem = np.argsort(primeira, kind="stable")
+    # peso_ausente int no meio de pesos float: a máscara devolve o tipo de cada um
+    inteiros = np.array([type(w) is int for w in pesos], dtype=bool)
+    pesos = np.asarray(pesos, dtype=np.int64 if inteiros.all() and len(pesos) else np.float64)
+    extras = {"inteiros": inteiros[ultimo[ordem]]} if 0 < inteiros.sum() < len(inteiros) else {}
+    np.savez(
+        caminho,
+        chave=np.array(chave),
+        nos=np.array(nos, dtype=str),
+        frequencias=np.asarray(frequencias, dtype=np.int64),
+        tipos=np.array(tipos if tipos is not None else [], dtype=str),
+        origem=origem[primeira[ordem]].astype(np.int32),
+        destino=destino[primeira[ordem]].astype(np.int32),
+        pesos=pesos[ultimo[ordem]],
+        **extras,
+    )
+
+
+def _ler_cache(caminho: str, chave: str, com_tipos: bool):
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with np.load(caminho, allow_pickle=False) as z:
+            if str(z["chave"]) != chave:
+                return None
+            tipos = z["tipos"].tolist() if com_tipos else None
+            pesos = z["pesos"].tolist()
+            if "inteiros" in z.files:
+                pesos = [int(w) if i else w for w, i in zip(pesos, z["inteiros"].tolist())]
+            return z["nos"].tolist(), z["frequencias"].tolist(), tipos, z["origem"], z["destino"], pesos
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def validar_colunas(df: pd.DataFrame, caminho: str, colunas):
+    for c in colunas:
+        if c not in df.columns:
+            raise ValueError(f"{os.path.basename(caminho)} precisa ter a coluna '{c}'")
+
+
+def carregar_grafo(nodes_path: str, edges_path: str, tipo_peso: str = "int", peso_ausente=1,
+                   tipos_novos: tuple[str, str] | None = None, colunas_nos: tuple[str, ...] = ("Id",)) -> nx.Graph:
+    # tipo_peso: "int", "float" ou "auto" (int se a coluna Weight for inteira);
+    # tipos_novos: grava node_type (coluna Type) e o tipo das pontas que só aparecem nas arestas
+    if not os.path.exists(nodes_path):
+        raise FileNotFoundError(f"Não encontrei: {nodes_path}")
+    if not os.path.exists(edges_path):
+        raise FileNotFoundError(f"Não encontrei: {edges_path}")
+    opcoes = (tipo_peso, peso_ausente, tipos_novos)
+    cache = caminho_cache(nodes_path)
+    chave = hash_entradas([nodes_path, edges_path], opcoes) if USAR_CACHE_GRAFO else None
+
+    if USAR_CACHE_GRAFO:
+        partes = _ler_cache(cache, chave, tipos_novos is not None)
+        if partes is not None:
+            print(f"[INFO] Grafo lido do cache: {cache}")
+            return _grafo(*partes)
+
+    nodes = pd.read_csv(nodes_path)
+    edges = pd.read_csv(edges_path)
+    validar_colunas(nodes, nodes_path, colunas_nos)
+    validar_colunas(edges, edges_path, ("Source", "Target", "Weight"))
+    partes = _montar(nodes, edges, tipo_peso, peso_ausente, tipos_novos)
+    if USAR_CACHE_GRAFO:
+        _gravar_cache(cache, chave, *partes)
+    return _grafo(*partes)
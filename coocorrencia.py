@@ -0,0 +1,217 @@
+import os
+import numpy as np
+
+from armazem_tokens import ArmazemTokens
+
+# blocos usados quando o armazém vem mapeado do disco: a memória fica do tamanho do bloco
+BLOCO_IDS = 4_000_000
+BLOCO_POSTS = 50_000
+
+
+def scipy_disponivel() -> bool:
+    try:
+        import scipy.sparse  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def usar_esparso(motor: str) -> bool:
+    if motor != "esparso":
+        return False
+    if not scipy_disponivel():
+        print("[AVISO] scipy não instalado: contando coocorrências com Counter")
+        return False
+    return True
+
+
+def ordenar_vocab(tokens: ArmazemTokens, pasta_temp: str | None = None) -> ArmazemTokens:
+    # renumera os ids na ordem das strings: no triângulo superior (i < j) o par já sai como (u, v) com u < v
+    ordem = sorted(range(len(tokens.vocab)), key=tokens.vocab.__getitem__)
+    rank = np.empty(len(ordem), dtype=np.int32)
+    rank[ordem] = np.arange(len(ordem), dtype=np.int32)
+    vocab = [tokens.vocab[i] for i in ordem]
+    primeira = tokens.ordem_primeira()[ordem]
+    if not isinstance(tokens.ids, np.memmap):
+        return ArmazemTokens(vocab, rank[np.asarray(tokens.ids)], tokens.offsets, primeira)
+
+    # armazém em disco: renumera bloco a bloco para um arquivo temporário, também mapeado
+    # (o arquivo some quando o mapeamento é liberado)
+    import tempfile
+
+    with tempfile.TemporaryFile(dir=pasta_temp) as f:
+        ids = np.memmap(f, dtype=np.int32, mode="w+", shape=tokens.ids.shape)
+    for ini in range(0, len(ids), BLOCO_IDS):
+        ids[ini:ini + BLOCO_IDS] = rank[tokens.ids[ini:ini + BLOCO_IDS]]
+    return ArmazemTokens(vocab, ids, tokens.offsets, primeira)
+
+
+def incidencia(tokens: ArmazemTokens, binaria: bool):
+    # matriz post x termo; sem binarizar, cada célula conta as ocorrências do termo no post
+    from scipy import sparse
+
+    # cópia dos ids: sum_duplicates ordena os índices no lugar e não pode mexer no armazém
+    dados = np.ones(len(tokens.ids), dtype=np.int32)
+    X = sparse.csr_matrix(
+        (dados, np.array(tokens.ids), np.array(tokens.offsets)),
+        shape=(len(tokens), len(tokens.vocab)),
+    )
+    X.sum_duplicates()
+    if binaria:
+        X.data[:] = 1
+    return X
+
+
+def frequencias(X) -> np.ndarray:
+    return np.asarray(X.sum(axis=0)).ravel().astype(np.int64)
+
+
+def pares(X, colunas: np.ndarray, min_peso: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # contagem de posts por par (i < j) entre as colunas escolhidas: triângulo superior de BᵀB
+    from scipy import sparse
+
+    colunas = np.sort(np.asarray(colunas, dtype=np.int64))
+    B = X[:, colunas].astype(np.int32)
+    B.data[:] = 1
+    C = sparse.triu(B.T @ B, k=1).tocoo()
+    manter = C.data >= min_peso
+    return colunas[C.row[manter]], colunas[C.col[manter]], C.data[manter].astype(np.int64)
+
+
+def blocos_posts(tokens: ArmazemTokens, bloco_posts: int):
+    # (nº de posts do bloco, post relativo ao bloco, id) de cada posição, lidos de bloco_posts em
+    # bloco_posts posts
+    for ini in range(0, len(tokens), bloco_posts):
+        fim = min(ini + bloco_posts, len(tokens))
+        o_ini, o_fim = int(tokens.offsets[ini]), int(tokens.offsets[fim])
+        ids = np.asarray(tokens.ids[o_ini:o_fim], dtype=np.int64)
+        posts = np.repeat(np.arange(fim - ini, dtype=np.int64), np.diff(tokens.offsets[ini:fim + 1]))
+        yield fim - ini, posts, ids
+
+
+def frequencias_por_post(tokens: ArmazemTokens, bloco_posts: int = BLOCO_POSTS) -> np.ndarray:
+    # número de posts em que cada termo aparece (sem scipy)
+    n_vocab = len(tokens.vocab)
+    freq = np.zeros(n_vocab, dtype=np.int64)
+    for _, posts, ids in blocos_posts(tokens, bloco_posts):
+        freq += np.bincount(np.unique(posts * n_vocab + ids) % n_vocab, minlength=n_vocab)
+    return freq
+
+
+def pares_janela(tokens: ArmazemTokens, colunas: np.ndarray, k: int,
+                 peso_por_distancia: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # cada ocorrência de u e v a até k posições no mesmo post conta 1 (ou 1/distância);
+    # k deslocamentos do vetor de ids: custo O(k · n_tokens)
+    ids = np.asarray(tokens.ids, dtype=np.int64)
+    posts = tokens.posts()
+    n_vocab = len(tokens.vocab)
+    selecionados = np.zeros(n_vocab, dtype=bool)
+    selecionados[colunas] = True
+
+    chaves, pesos = [], []
+    for d in range(1, k + 1):
+        u, v = ids[:-d], ids[d:]
+        ok = (posts[:-d] == posts[d:]) & (u != v) & selecionados[u] & selecionados[v]
+        u, v = u[ok], v[ok]
+        chaves.append(np.minimum(u, v) * n_vocab + np.maximum(u, v))
+        pesos.append(np.full(len(u), 1.0 / d if peso_por_distancia else 1.0))
+
+    if not chaves:
+        vazio = np.zeros(0, dtype=np.int64)
+        return vazio, vazio, np.zeros(0)
+    unicas, inverso = np.unique(np.concatenate(chaves), return_inverse=True)
+    soma = np.bincount(inverso, weights=np.concatenate(pesos), minlength=len(unicas))
+    if not peso_por_distancia:
+        soma = soma.astype(np.int64)
+    return unicas // n_vocab, unicas % n_vocab, soma
+
+
+def _pares_do_bloco(posts: np.ndarray, ids: np.ndarray, n_vocab: int) -> tuple[np.ndarray, np.ndarray]:
+    # posts/ids: pares (post, id) únicos e ordenados; o deslocamento d liga a posição i à i + d
+    # do mesmo post, e como os ids do post estão em ordem crescente a chave já sai com u < v
+    chaves = []
+    idx = np.arange(len(ids) - 1)
+    d = 1
+    while len(idx):
+        idx = idx[idx + d < len(ids)]
+        idx = idx[posts[idx] == posts[idx + d]]
+        chaves.append(ids[idx] * n_vocab + ids[idx + d])
+        d += 1
+    return np.unique(np.concatenate(chaves) if chaves else np.zeros(0, dtype=np.int64), return_counts=True)
+
+
+def _somar(partes: list[tuple[np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    chaves, inverso = np.unique(np.concatenate([c for c, _ in partes]), return_inverse=True)
+    soma = np.bincount(inverso, weights=np.concatenate([w for _, w in partes]), minlength=len(chaves))
+    return chaves, soma.astype(np.int64)
+
+
+def _mesclar_runs(runs: list[tuple[np.ndarray, np.ndarray]], min_peso: int, bloco: int):
+    # k-way merge vetorizado: carrega até `bloco` chaves de cada run, soma tudo que é <= à menor
+    # das últimas chaves carregadas (nenhuma run tem mais nada abaixo disso) e avança
+    pos = [0] * len(runs)
+    while True:
+        ativos = [r for r in range(len(runs)) if pos[r] < len(runs[r][0])]
+        if not ativos:
+            return
+        fronteira = min(runs[r][0][min(pos[r] + bloco, len(runs[r][0])) - 1] for r in ativos)
+        partes = []
+        for r in ativos:
+            chaves, pesos = runs[r]
+            fim = pos[r] + int(np.searchsorted(chaves[pos[r]:pos[r] + bloco], fronteira, side="right"))
+            partes.append((np.asarray(chaves[pos[r]:fim]), np.asarray(pesos[pos[r]:fim])))
+            pos[r] = fim
+        chaves, soma = _somar(partes)
+        manter = soma >= min_peso
+        yield chaves[manter], soma[manter]
+
+
+def pares_em_disco(tokens: ArmazemTokens, colunas: np.ndarray, min_peso: int, limite_pares: int,
+                   bloco_posts: int, pasta_temp: str | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # mesma contagem de pares(): número de posts por par (u < v) entre as colunas escolhidas.
+    # Os posts são lidos em blocos de bloco_posts; passando de ~limite_pares chaves em memória, o
+    # buffer vira uma run ordenada em pasta_temp (None = pasta temporária do sistema) e no fim as
+    # runs são mescladas já cortando pelo min_peso (só as arestas que ficam voltam para a memória)
+    import tempfile
+
+    n_vocab = len(tokens.vocab)
+    selecionados = np.zeros(n_vocab, dtype=bool)
+    selecionados[colunas] = True
+
+    with tempfile.TemporaryDirectory(prefix="pares_", dir=pasta_temp) as pasta:
+        runs, buffer, no_buffer = [], [], 0
+
+        def despejar():
+            chaves, soma = _somar(buffer)
+            caminho = os.path.join(pasta, f"run_{len(runs):05d}")
+            np.save(caminho + "_chaves.npy", chaves)
+            np.save(caminho + "_pesos.npy", soma)
+            runs.append(caminho)
+            buffer.clear()
+
+        for _, posts, ids in blocos_posts(tokens, bloco_posts):
+            sel = selecionados[ids]
+            unicas = np.unique(posts[sel] * n_vocab + ids[sel])
+            chaves, contagens = _pares_do_bloco(unicas // n_vocab, unicas % n_vocab, n_vocab)
+            buffer.append((chaves, contagens))
+            no_buffer += len(chaves)
+            if no_buffer >= limite_pares:
+                despejar()
+                no_buffer = 0
+
+        if not runs:
+            chaves, soma = _somar(buffer) if buffer else (np.zeros(0, dtype=np.int64),) * 2
+            manter = soma >= min_peso
+            chaves, soma = chaves[manter], soma[manter]
+        else:
+            if buffer:
+                despejar()
+            print(f"[INFO] Coocorrência em disco: {len(runs)} runs mescladas")
+            abertas = [(np.load(c + "_chaves.npy", mmap_mode="r"), np.load(c + "_pesos.npy", mmap_mode="r"))
+                       for c in runs]
+            resultado = list(_mesclar_runs(abertas, min_peso, max(limite_pares // len(runs), 1)))
+            del abertas
+            chaves = np.concatenate([c for c, _ in resultado]) if resultado else np.zeros(0, dtype=np.int64)
+            soma = np.concatenate([w for _, w in resultado]) if resultado else np.zeros(0, dtype=np.int64)
+
+    return chaves // n_vocab, chaves % n_vocab, soma
@@ -0,0 +1,172 @@
+import os
+import re
+import glob
+import pandas as pd
+
+ARQUIVO_CSV = "cleaned_posts.csv"
+PASTA_PARQUET = "cleaned_posts_parquet"
+
+# colunas que no Parquet são listas nativas e no CSV viram "<col>_str" (itens separados por espaço)
+COLUNAS_LISTA = ("tokens", "hashtags", "hashtags_sem_genericas")
+COLUNAS_HASHTAG = ("hashtags", "hashtags_sem_genericas")
+COLUNAS_DATA = ("created_at", "indexed_at")
+
+HASHTAGS_GENERICAS = {"#bbb", "#bbb26"}
+
+HASHTAG_RE = re.compile(r"#\w+", flags=re.UNICODE)
+
+
+def parquet_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def partes_parquet(pasta: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(pasta, PASTA_PARQUET, "part-*.parquet")))
+
+
+def remover_parquet(pasta: str):
+    for p in partes_parquet(pasta):
+        os.remove(p)
+
+
+class EscritorParquet:
+    def __init__(self, pasta: str, anexar: bool = False):
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        destino = os.path.join(pasta, PASTA_PARQUET)
+        os.makedirs(destino, exist_ok=True)
+        if not anexar:
+            remover_parquet(pasta)
+
+        existentes = partes_parquet(pasta)
+        proximo = int(os.path.basename(existentes[-1])[5:10]) + 1 if existentes else 0
+        self.caminho = os.path.join(destino, f"part-{proximo:05d}.parquet")
+        self._writer = None
+        self._schema = None
+        self.linhas = 0
+
+    def _normalizar_schema(self, schema):
+        import pyarrow as pa
+
+        campos = []
+        for campo in schema:
+            tipo = campo.type
+            if pa.types.is_null(tipo):
+                tipo = pa.string()
+            elif pa.types.is_list(tipo) and pa.types.is_null(tipo.value_type):
+                tipo = pa.list_(pa.string())
+            campos.append(pa.field(campo.name, tipo))
+        return pa.schema(campos)
+
+    def escrever(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        df = df.drop(columns=[f"{c}_str" for c in COLUNAS_LISTA if f"{c}_str" in df.columns])
+        if self._schema is None:
+            self._schema = self._normalizar_schema(pa.Schema.from_pandas(df, preserve_index=False))
+            self._writer = self._pq.ParquetWriter(self.caminho, self._schema)
+        tabela = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(tabela)
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _ler_parquet(pasta: str, colunas: list[str] | None) -> pd.DataFrame:
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(partes_parquet(pasta), format="parquet")
+    if colunas is not None:
+        colunas = [c for c in colunas if c in dataset.schema.names]
+    df = dataset.to_table(columns=colunas).to_pandas()
+    for c in COLUNAS_LISTA:
+        if c in df.columns:
+            df[c] = [list(x) if x is not None else [] for x in df[c]]
+    return df
+
+
+def _ler_csv(csv_path: str, colunas: list[str] | None) -> pd.DataFrame:
+    header = pd.read_csv(csv_path, nrows=0).columns
+    pedidas = list(header) if colunas is None else colunas
+
+    usecols = []
+    for c in pedidas:
+        if c in COLUNAS_LISTA and f"{c}_str" in header:
+            usecols.append(f"{c}_str")
+        elif c in header:
+            usecols.append(c)
+    usecols = list(dict.fromkeys(usecols))
+
+    # converters=str: um token "nan" não pode virar NaN na leitura
+    listas = {f"{c}_str": str for c in COLUNAS_LISTA if f"{c}_str" in usecols}
+    df = pd.read_csv(csv_path, usecols=usecols, converters=listas)
+    df = df[usecols]
+    for c in COLUNAS_DATA:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c], errors="coerce", utc=True, format="ISO8601")
+    for c in COLUNAS_LISTA:
+        if c in pedidas and f"{c}_str" in df.columns:
+            df[c] = [s.split() for s in df[f"{c}_str"]]
+            if f"{c}_str" not in pedidas:
+                df = df.drop(columns=[f"{c}_str"])
+    return df
+
+
+def colunas_dados_limpos(pasta: str, arquivo_csv: str = ARQUIVO_CSV) -> list[str]:
+    if partes_parquet(pasta) and parquet_disponivel():
+        import pyarrow.dataset as ds
+        return list(ds.dataset(partes_parquet(pasta), format="parquet").schema.names)
+
+    csv_path = os.path.join(pasta, arquivo_csv)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Não encontrei: {csv_path}")
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    return header + [c for c in COLUNAS_LISTA if f"{c}_str" in header and c not in header]
+
+
+def ler_dados_limpos(pasta: str, colunas: list[str] | None = None, arquivo_csv: str = ARQUIVO_CSV) -> pd.DataFrame:
+    if partes_parquet(pasta) and parquet_disponivel():
+        return _ler_parquet(pasta, colunas)
+
+    csv_path = os.path.join(pasta, arquivo_csv)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Não encontrei: {csv_path}")
+    return _ler_csv(csv_path, colunas)
+
+
+def extract_hashtags(text: str) -> list[str]:
+    text = "" if pd.isna(text) else str(text)
+    return [t.lower() for t in HASHTAG_RE.findall(text)]
+
+
+def adicionar_hashtags(df: pd.DataFrame, col_texto: str = "text_clean", genericas: frozenset | None = None):
+    genericas = HASHTAGS_GENERICAS if genericas is None else genericas
+    # extraídas do texto limpo: URLs já removidas, então "#fragmento" de link não vira hashtag
+    df["hashtags"] = [extract_hashtags(t) for t in df[col_texto]]
+    df["hashtags_sem_genericas"] = [
+        [t for t in tags if t not in genericas] for tags in df["hashtags"]
+    ]
+
+
+def ler_com_hashtags(pasta: str, colunas: list[str], arquivo_csv: str = ARQUIVO_CSV,
+                     colunas_hashtag: tuple[str, ...] = COLUNAS_HASHTAG) -> pd.DataFrame:
+    disponiveis = colunas_dados_limpos(pasta, arquivo_csv)
+    if all(c in disponiveis for c in colunas_hashtag):
+        return ler_dados_limpos(pasta, colunas + list(colunas_hashtag), arquivo_csv)
+
+    # dados limpos gerados antes de a limpeza extrair as hashtags
+    col_texto = "text_clean" if "text_clean" in disponiveis else "text"
+    if col_texto not in disponiveis:
+        raise ValueError("Os dados limpos precisam ter 'hashtags', 'text_clean' ou 'text'.")
+    df = ler_dados_limpos(pasta, colunas + [col_texto], arquivo_csv)
+    adicionar_hashtags(df, col_texto)
+    extras = [c for c in (col_texto, *COLUNAS_HASHTAG) if c not in colunas and c not in colunas_hashtag]
+    return df.drop(columns=extras)
@@ -0,0 +1,176 @@
+import os
+import hashlib
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+from minhash_lsh import VAZIO, assinaturas, bandas_para_limiar, chaves_bandas, hash_itens
+
+# Estado guardado entre execuções incrementais (<pasta>/estado_deduplicacao.npz): digests dos
+# textos já vistos, buckets LSH -> clusters, assinatura do 1º post de cada cluster, tamanhos e
+# exemplos. Com ele o modo incremental remove duplicatas de execuções anteriores e continua a
+# numeração de cluster_duplicata em vez de recomeçar do zero.
+VERSAO_ESTADO = 1
+
+
+def shingles(tokens: list[str], k: int) -> list[str]:
+    if len(tokens) < k:
+        return [" ".join(tokens)] if tokens else []
+    return list(dict.fromkeys(" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)))
+
+
+def digest_texto(texto: str) -> bytes:
+    return hashlib.blake2b(texto.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _juntar_textos(textos: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    dados = [t.encode("utf-8", "surrogatepass") for t in textos]
+    offsets = np.zeros(len(dados) + 1, dtype=np.int64)
+    np.cumsum([len(d) for d in dados], out=offsets[1:])
+    return np.frombuffer(b"".join(dados), dtype=np.uint8), offsets
+
+
+def _separar_textos(dados: np.ndarray, offsets: np.ndarray) -> list[str]:
+    bruto = dados.tobytes()
+    return [bruto[a:b].decode("utf-8", "surrogatepass") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+class Deduplicador:
+    # guarda estado entre chunks: o resultado do streaming é o mesmo da leitura completa
+    def __init__(self, n_perm: int, limiar: float, k_shingle: int, seed: int, remover_quase: bool):
+        self.n_perm = n_perm
+        self.limiar = limiar
+        self.k_shingle = k_shingle
+        self.seed = seed
+        self.remover_quase = remover_quase
+        self.bandas, self.linhas = bandas_para_limiar(n_perm, limiar)
+        self._vistos = set()
+        self._buckets = [{} for _ in range(self.bandas)]
+        # assinatura (32 bits baixos de cada componente) do 1º post de cada cluster
+        self._representantes = np.zeros((0, n_perm), dtype=np.uint32)
+        self.tamanhos = Counter()
+        self.exemplos = {}
+        self.exatas_removidas = 0
+        self.quase_removidas = 0
+
+    def _parametros(self) -> np.ndarray:
+        return np.array([VERSAO_ESTADO, self.n_perm, self.limiar, self.k_shingle, self.seed], dtype=np.float64)
+
+    def _assinaturas(self, tokens: pd.Series) -> np.ndarray:
+        por_post = [shingles(list(t), self.k_shingle) for t in tokens]
+        offsets = np.zeros(len(por_post) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in por_post], out=offsets[1:])
+        hashes = hash_itens(s for lst in por_post for s in lst)
+        return assinaturas(hashes, offsets, self.n_perm, self.seed)
+
+    def _novo_cluster(self, assinatura: np.ndarray, exemplo: str) -> int:
+        cluster = len(self.tamanhos)
+        if cluster == len(self._representantes):
+            maior = np.zeros((max(16, 2 * cluster), self.n_perm), dtype=np.uint32)
+            maior[:cluster] = self._representantes
+            self._representantes = maior
+        self._representantes[cluster] = assinatura
+        self.tamanhos[cluster] = 0
+        self.exemplos[cluster] = exemplo
+        return cluster
+
+    def _cluster_de(self, assinatura: np.ndarray, chaves: list[bytes]) -> int | None:
+        # dos clusters que dividem algum bucket, o de maior Jaccard estimado com o representante,
+        # se passar do limiar (bucket em comum sozinho não basta: a banda só filtra candidatos)
+        candidatos = sorted({c for b, k in zip(self._buckets, chaves) for c in b.get(k, ())})
+        if not candidatos:
+            return None
+        jaccard = (self._representantes[candidatos] == assinatura).mean(axis=1)
+        melhor = int(np.argmax(jaccard))
+        return candidatos[melhor] if jaccard[melhor] >= self.limiar else None
+
+    def processar(self, df: pd.DataFrame) -> pd.DataFrame:
+        novo = np.zeros(len(df), dtype=bool)
+        for i, texto in enumerate(df["text_clean"]):
+            h = digest_texto(texto)
+            if h not in self._vistos:
+                self._vistos.add(h)
+                novo[i] = True
+        self.exatas_removidas += int((~novo).sum())
+        df = df[novo].copy()
+
+        if "tokens" not in df.columns:
+            return df
+
+        sig = self._assinaturas(df["tokens"])
+        baixos = (sig & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        clusters = np.full(len(df), -1, dtype=np.int64)
+        primeiro = np.ones(len(df), dtype=bool)
+        for j, chaves in enumerate(chaves_bandas(sig, self.bandas, self.linhas)):
+            if sig[j, 0] == VAZIO:
+                continue
+            cluster = self._cluster_de(baixos[j], chaves)
+            if cluster is None:
+                cluster = self._novo_cluster(baixos[j], df["text_clean"].iat[j])
+            for b, k in zip(self._buckets, chaves):
+                membros = b.setdefault(k, [])
+                if cluster not in membros:
+                    membros.append(cluster)
+            self.tamanhos[cluster] += 1
+            clusters[j] = cluster
+            primeiro[j] = self.tamanhos[cluster] == 1
+
+        df["cluster_duplicata"] = clusters
+        if self.remover_quase:
+            self.quase_removidas += int((~primeiro).sum())
+            df = df[primeiro]
+        return df
+
+    def relatorio(self) -> pd.DataFrame:
+        linhas = [
+            {"cluster": c, "tamanho": n, "exemplo": self.exemplos[c]}
+            for c, n in self.tamanhos.items() if n > 1
+        ]
+        return pd.DataFrame(linhas, columns=["cluster", "tamanho", "exemplo"]).sort_values(
+            ["tamanho", "cluster"], ascending=[False, True]
+        )
+
+    def salvar(self, path: str):
+        n_clusters = len(self.tamanhos)
+        banda, chave, cluster = [], [], []
+        for i, b in enumerate(self._buckets):
+            for k, membros in b.items():
+                for c in membros:
+                    banda.append(i)
+                    chave.append(k)
+                    cluster.append(c)
+        exemplos, offsets_exemplos = _juntar_textos([self.exemplos[c] for c in range(n_clusters)])
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            parametros=self._parametros(),
+            vistos=np.frombuffer(b"".join(sorted(self._vistos)), dtype=np.uint8).reshape(-1, 16),
+            banda=np.array(banda, dtype=np.int32),
+            chave=np.frombuffer(b"".join(chave), dtype=np.uint8).reshape(len(chave), self.linhas * 8),
+            cluster=np.array(cluster, dtype=np.int64),
+            representantes=self._representantes[:n_clusters],
+            tamanhos=np.array([self.tamanhos[c] for c in range(n_clusters)], dtype=np.int64),
+            exemplos=exemplos,
+            offsets_exemplos=offsets_exemplos,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def carregar(cls, path: str, n_perm: int, limiar: float, k_shingle: int, seed: int, remover_quase: bool):
+        # None se não houver estado ou se ele foi gerado com outros parâmetros
+        if not os.path.exists(path):
+            return None
+        dedup = cls(n_perm, limiar, k_shingle, seed, remover_quase)
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if not np.array_equal(z["parametros"], dedup._parametros()):
+                    return None
+                dedup._vistos = {d.tobytes() for d in z["vistos"]}
+                for i, k, c in zip(z["banda"].tolist(), z["chave"], z["cluster"].tolist()):
+                    dedup._buckets[i].setdefault(k.tobytes(), []).append(c)
+                dedup._representantes = np.array(z["representantes"], dtype=np.uint32).reshape(-1, n_perm)
+                dedup.tamanhos = Counter(dict(enumerate(z["tamanhos"].tolist())))
+                dedup.exemplos = dict(enumerate(_separar_textos(z["exemplos"], z["offsets_exemplos"])))
+        except (OSError, KeyError, ValueError):
+            return None
+        return dedup
@@ -0,0 +1,114 @@
+import io
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# bytes do fim da parte já processada usados para detectar se o CSV bruto foi reescrito
+BYTES_ASSINATURA = 64 * 1024
+
+
+def assinatura_arquivo(path: str, offset: int) -> str:
+    inicio = max(0, offset - BYTES_ASSINATURA)
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        return hashlib.sha256(f.read(offset - inicio)).hexdigest()
+
+
+def chaves_posts(df: pd.DataFrame) -> pd.Series | None:
+    if "uri" not in df.columns or "cid" not in df.columns:
+        return None
+    return df["uri"].fillna("").astype(str) + "|" + df["cid"].fillna("").astype(str)
+
+
+class EstadoIncremental:
+    def __init__(self, colunas: list[str], offset: int = 0, assinatura: str | None = None,
+                 watermark: pd.Timestamp | None = None, chaves: dict | None = None):
+        self.colunas = colunas
+        self.offset = offset
+        self.assinatura = assinatura
+        self.watermark = watermark
+        self.chaves = chaves or {}
+
+    @classmethod
+    def carregar(cls, path: str):
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            d = json.load(f)
+        watermark = pd.Timestamp(d["watermark"]) if d.get("watermark") else None
+        chaves = {k: (pd.Timestamp(v) if v else None) for k, v in d.get("chaves", {}).items()}
+        return cls(d["colunas"], d["offset"], d.get("assinatura"), watermark, chaves)
+
+    def salvar(self, path: str):
+        d = {
+            "colunas": list(self.colunas),
+            "offset": self.offset,
+            "assinatura": self.assinatura,
+            "watermark": self.watermark.isoformat() if self.watermark is not None else None,
+            "chaves": {k: (v.isoformat() if v is not None else None) for k, v in self.chaves.items()},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(d, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def posicao_valida(self, input_path: str) -> bool:
+        if os.path.getsize(input_path) < self.offset:
+            return False
+        return assinatura_arquivo(input_path, self.offset) == self.assinatura
+
+    def avancar(self, input_path: str, offset: int):
+        self.offset = offset
+        self.assinatura = assinatura_arquivo(input_path, offset)
+
+    def ler_novas_linhas(self, input_path: str, dtypes: dict) -> tuple[pd.DataFrame, int]:
+        # supõe que o coletor só anexa linhas inteiras ao CSV bruto
+        fim = os.path.getsize(input_path)
+        with open(input_path, "rb") as f:
+            f.seek(self.offset)
+            dados = f.read(fim - self.offset)
+        if not dados.strip():
+            return pd.DataFrame(columns=self.colunas), fim
+        dtypes = {c: t for c, t in dtypes.items() if c in self.colunas}
+        df = pd.read_csv(io.BytesIO(dados), header=None, names=self.colunas, dtype=dtypes)
+        return df, fim
+
+    def _indexados(self, df: pd.DataFrame) -> pd.Series | None:
+        if "indexed_at" not in df.columns:
+            return None
+        return pd.to_datetime(df["indexed_at"], errors="coerce", utc=True, format="ISO8601")
+
+    def filtrar_novos(self, df: pd.DataFrame) -> pd.DataFrame:
+        # fica a 1ª ocorrência de cada uri|cid do lote que não esteja no seen-set (busca por chave
+        # no dict: custo do lote, não do seen-set). O CSV bruto não vem ordenado por indexed_at,
+        # então post antigo e inédito é mantido.
+        chaves = chaves_posts(df)
+        if chaves is None:
+            return df
+        vistas = pd.Series(np.fromiter((c in self.chaves for c in chaves), dtype=bool, count=len(chaves)),
+                           index=df.index)
+        return df[~vistas & ~chaves.duplicated()].copy()
+
+    def registrar(self, df: pd.DataFrame):
+        indexados = self._indexados(df)
+        if indexados is not None and indexados.notna().any():
+            maximo = indexados.max()
+            if self.watermark is None or maximo > self.watermark:
+                self.watermark = maximo
+
+        chaves = chaves_posts(df)
+        if chaves is None:
+            return
+        if indexados is None:
+            indexados = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+        self.chaves.update(
+            (chave, None if pd.isna(ts) else ts) for chave, ts in zip(chaves, indexados)
+        )
+
+    def podar(self, janela: pd.Timedelta):
+        # a cada lote: só uri|cid com indexed_at >= watermark - janela (ou sem data) seguem
+        if self.watermark is not None:
+            limite = self.watermark - janela
+            self.chaves = {k: v for k, v in self.chaves.items() if v is None or v >= limite}
@@ -0,0 +1,301 @@
+import math
+import numpy as np
+
+# ForceAtlas2 (Jacomy et al., 2014) em NumPy, com os mesmos parâmetros do pacote fa2 / Gephi:
+#   repulsão k_r * m_i * m_j / d (scalingRatio, massa = 1 + grau), exata ou por Barnes-Hut
+#   (barnesHutTheta: a célula é tratada como um ponto quando d * theta > tamanho da célula);
+#   atração linear ou log(1 + d) (linLogMode), dividida pela massa da origem com
+#   outboundAttractionDistribution, com peso^edgeWeightInfluence; gravidade normal ou forte;
+#   adjustSizes desconta o raio dos nós (atributo "size", padrão 1) e evita sobreposição;
+#   velocidade global adaptativa pelo swing/traction (jitterTolerance), como no Gephi.
+# Diferente do fa2, para antes de `iterations` quando o layout assenta: a cada JANELA_PARADA
+# iterações mede o deslocamento líquido médio dos nós na janela, em espaçamentos típicos do grafo
+# (extensão / sqrt(n)), e para quando ele fica abaixo de LIMIAR_PARADA por duas janelas seguidas.
+# O vaivém de uma iteração para a outra se cancela na janela; o que sobra é o layout andando.
+
+LIMIAR_PARADA = 0.1
+JANELA_PARADA = 25
+NIVEIS_QUADTREE = 12
+BLOCO_EXATA = 2_000_000    # pares por bloco na repulsão exata
+
+
+def _morton(ix: np.ndarray, iy: np.ndarray, niveis: int) -> np.ndarray:
+    codigo = np.zeros(len(ix), dtype=np.int64)
+    for b in range(niveis):
+        codigo |= ((ix >> b) & 1) << (2 * b)
+        codigo |= ((iy >> b) & 1) << (2 * b + 1)
+    return codigo
+
+
+class _Quadtree:
+    # células por nível a partir do código de Morton: massa, centro de massa, nº de nós,
+    # tamanho (2 x maior distância de um nó ao centro, como no Gephi) e filhos contíguos
+    def __init__(self, pos: np.ndarray, massa: np.ndarray, niveis: int):
+        n = len(pos)
+        minimo = pos.min(axis=0)
+        largura = float(np.ptp(pos, axis=0).max()) or 1.0
+        grade = np.clip(((pos - minimo) / largura * (1 << niveis)).astype(np.int64), 0, (1 << niveis) - 1)
+        codigo = _morton(grade[:, 0], grade[:, 1], niveis)
+
+        self.niveis = niveis
+        self.celula, self.massa, self.centro, self.contagem, self.tamanho, self.membro = [], [], [], [], [], []
+        self.filho_ini, self.filho_fim = [], []
+        chaves_ant = None
+        for nivel in range(niveis + 1):
+            chaves, inv = np.unique(codigo >> (2 * (niveis - nivel)), return_inverse=True)
+            inv = inv.ravel()
+            m = np.bincount(inv, weights=massa, minlength=len(chaves))
+            centro = np.stack([np.bincount(inv, weights=massa * pos[:, 0], minlength=len(chaves)),
+                               np.bincount(inv, weights=massa * pos[:, 1], minlength=len(chaves))], axis=1) / m[:, None]
+            tamanho = np.zeros(len(chaves))
+            np.maximum.at(tamanho, inv, 2.0 * np.linalg.norm(pos - centro[inv], axis=1))
+            membro = np.empty(len(chaves), dtype=np.int64)
+            membro[inv] = np.arange(n)
+            self.celula.append(inv)
+            self.massa.append(m)
+            self.centro.append(centro)
+            self.contagem.append(np.bincount(inv, minlength=len(chaves)))
+            self.tamanho.append(tamanho)
+            self.membro.append(membro)
+            if chaves_ant is not None:
+                pai = np.searchsorted(chaves_ant, chaves >> 2)
+                self.filho_ini.append(np.searchsorted(pai, np.arange(len(chaves_ant)), side="left"))
+                self.filho_fim.append(np.searchsorted(pai, np.arange(len(chaves_ant)), side="right"))
+            chaves_ant = chaves
+
+        # nós de cada folha, para as folhas com mais de um nó (posições coincidentes na grade)
+        folha = self.celula[-1]
+        self.ordem_folha = np.argsort(folha, kind="stable")
+        self.folha_ini = np.searchsorted(folha[self.ordem_folha], np.arange(len(self.massa[-1])), side="left")
+
+
+def _expandir(ini: np.ndarray, fim: np.ndarray, dono: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # (dono repetido, índice) para cada intervalo [ini, fim)
+    tamanhos = fim - ini
+    donos = np.repeat(dono, tamanhos)
+    base = np.repeat(ini - np.concatenate(([0], np.cumsum(tamanhos)[:-1])), tamanhos)
+    return donos, base + np.arange(tamanhos.sum())
+
+
+class ForceAtlas2:
+    def __init__(self, outboundAttractionDistribution=False, linLogMode=False, adjustSizes=False,
+                 edgeWeightInfluence=1.0, jitterTolerance=1.0, barnesHutOptimize=True, barnesHutTheta=1.2,
+                 multiThreaded=False, scalingRatio=2.0, strongGravityMode=False, gravity=1.0,
+                 verbose=True, seed=None, limiar_parada=None):
+        self.outboundAttractionDistribution = outboundAttractionDistribution
+        self.linLogMode = linLogMode
+        self.adjustSizes = adjustSizes
+        self.edgeWeightInfluence = edgeWeightInfluence
+        self.jitterTolerance = jitterTolerance
+        self.barnesHutOptimize = barnesHutOptimize
+        self.barnesHutTheta = barnesHutTheta
+        self.scalingRatio = scalingRatio
+        self.strongGravityMode = strongGravityMode
+        self.gravity = gravity
+        self.verbose = verbose
+        self.seed = seed
+        self.limiar_parada = LIMIAR_PARADA if limiar_parada is None else limiar_parada
+        self.iteracoes = 0     # iterações rodadas na última chamada
+
+    # --- forças -------------------------------------------------------------------------------
+
+    def _par(self, d: np.ndarray, dist: np.ndarray, mi: np.ndarray, mj: np.ndarray,
+             ri: np.ndarray | None, rj: np.ndarray | None) -> np.ndarray:
+        # repulsão de j sobre i (vetor d = p_i - p_j); com adjustSizes, nós sobrepostos se empurram forte
+        k = self.scalingRatio
+        if self.adjustSizes:
+            folga = dist - ri - rj
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fator = np.where(folga > 0, k * mi * mj / folga ** 2, np.where(folga < 0, 100.0 * k * mi * mj, 0.0))
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fator = np.where(dist > 0, k * mi * mj / dist ** 2, 0.0)
+        return d * fator[:, None]
+
+    def _repulsao_exata(self, pos, massa, raio, forca):
+        n = len(pos)
+        bloco = max(1, BLOCO_EXATA // max(n, 1))
+        for ini in range(0, n, bloco):
+            i = np.arange(ini, min(ini + bloco, n))
+            d = pos[i, None, :] - pos[None, :, :]
+            dist = np.sqrt((d ** 2).sum(axis=2))
+            mi, mj = massa[i, None], massa[None, :]
+            k = self.scalingRatio
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if self.adjustSizes:
+                    folga = dist - raio[i, None] - raio[None, :]
+                    fator = np.where(folga > 0, k * mi * mj / folga ** 2,
+                                     np.where(folga < 0, 100.0 * k * mi * mj, 0.0))
+                else:
+                    fator = np.where(dist > 0, k * mi * mj / dist ** 2, 0.0)
+            fator[np.arange(len(i)), i] = 0.0
+            forca[i] += (d * fator[:, :, None]).sum(axis=1)
+
+    def _repulsao_barnes_hut(self, pos, massa, raio, forca):
+        arvore = _Quadtree(pos, massa, NIVEIS_QUADTREE)
+        n = len(pos)
+        theta = self.barnesHutTheta
+        k = self.scalingRatio
+        no = np.arange(n)
+        cel = np.zeros(n, dtype=np.int64)
+        for nivel in range(arvore.niveis + 1):
+            if len(no) == 0:
+                break
+            d = pos[no] - arvore.centro[nivel][cel]
+            dist = np.sqrt((d ** 2).sum(axis=1))
+            contagem = arvore.contagem[nivel][cel]
+
+            # célula com um nó só: força direta nó a nó (com os raios)
+            unico = contagem == 1
+            j = arvore.membro[nivel][cel[unico]]
+            i = no[unico]
+            outro = j != i
+            i, j = i[outro], j[outro]
+            if len(i):
+                f = self._par(pos[i] - pos[j], dist[unico][outro], massa[i], massa[j],
+                              raio[i] if self.adjustSizes else None, raio[j] if self.adjustSizes else None)
+                np.add.at(forca, i, f)
+
+            # célula distante: o centro de massa faz as vezes dos nós
+            longe = ~unico & (dist * theta > arvore.tamanho[nivel][cel])
+            if longe.any():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    fator = np.where(dist[longe] > 0,
+                                     k * massa[no[longe]] * arvore.massa[nivel][cel[longe]] / dist[longe] ** 2, 0.0)
+                np.add.at(forca, no[longe], d[longe] * fator[:, None])
+
+            perto = ~unico & ~longe
+            if nivel == arvore.niveis:
+                # folha com vários nós: pares diretos com todos os outros da folha
+                i, pos_ordem = _expandir(arvore.folha_ini[cel[perto]],
+                                         arvore.folha_ini[cel[perto]] + contagem[perto], no[perto])
+                j = arvore.ordem_folha[pos_ordem]
+                outro = j != i
+                i, j = i[outro], j[outro]
+                if len(i):
+                    d = pos[i] - pos[j]
+                    f = self._par(d, np.sqrt((d ** 2).sum(axis=1)), massa[i], massa[j],
+                                  raio[i] if self.adjustSizes else None, raio[j] if self.adjustSizes else None)
+                    np.add.at(forca, i, f)
+                break
+            no, cel = _expandir(arvore.filho_ini[nivel][cel[perto]], arvore.filho_fim[nivel][cel[perto]], no[perto])
+
+    def _gravidade(self, pos, massa, forca):
+        dist = np.sqrt((pos ** 2).sum(axis=1))
+        if self.strongGravityMode:
+            fator = self.scalingRatio * massa * self.gravity
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fator = np.where(dist > 0, massa * self.gravity / dist, 0.0)
+        forca -= pos * fator[:, None]
+
+    def _atracao(self, pos, massa, raio, u, v, peso, coeficiente, forca):
+        d = pos[u] - pos[v]
+        dist = np.sqrt((d ** 2).sum(axis=1))
+        if self.adjustSizes:
+            dist = dist - raio[u] - raio[v]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.linLogMode:
+                fator = np.where(dist > 0, -coeficiente * peso * np.log1p(np.maximum(dist, 0)) / dist, 0.0)
+            else:
+                fator = -coeficiente * peso
+                if self.adjustSizes:
+                    fator = np.where(dist > 0, fator, 0.0)
+        if self.outboundAttractionDistribution:
+            fator = fator / massa[u]
+        f = d * np.broadcast_to(fator, dist.shape)[:, None]
+        for eixo in (0, 1):
+            forca[:, eixo] += np.bincount(u, weights=f[:, eixo], minlength=len(pos))
+            forca[:, eixo] -= np.bincount(v, weights=f[:, eixo], minlength=len(pos))
+
+    # --- laço principal -----------------------------------------------------------------------
+
+    def forceatlas2(self, pos: np.ndarray, u: np.ndarray, v: np.ndarray, peso: np.ndarray,
+                    raio: np.ndarray | None = None, iterations: int = 100) -> np.ndarray:
+        # pos (n, 2); arestas (u, v, peso) com u, v índices em pos
+        pos = np.array(pos, dtype=np.float64)
+        n = len(pos)
+        if n == 0:
+            self.iteracoes = 0
+            return pos
+        massa = 1.0 + np.bincount(u, minlength=n) + np.bincount(v, minlength=n)
+        raio = np.ones(n) if raio is None else np.asarray(raio, dtype=np.float64)
+        if self.edgeWeightInfluence == 0:
+            peso = np.ones(len(u))
+        elif self.edgeWeightInfluence != 1:
+            peso = np.power(peso, self.edgeWeightInfluence)
+        coeficiente = massa.mean() if self.outboundAttractionDistribution else 1.0
+
+        forca = np.zeros((n, 2))
+        velocidade, eficiencia = 1.0, 1.0
+        referencia = pos.copy()
+        abaixo = 0
+        deslocamento = None
+        feitas = 0
+        for feitas in range(1, iterations + 1):
+            anterior, forca = forca, np.zeros((n, 2))
+            if self.barnesHutOptimize:
+                self._repulsao_barnes_hut(pos, massa, raio, forca)
+            else:
+                self._repulsao_exata(pos, massa, raio, forca)
+            self._gravidade(pos, massa, forca)
+            self._atracao(pos, massa, raio, u, v, peso, coeficiente, forca)
+
+            # velocidade global (Gephi): swing = oscilação da força, traction = força "útil"
+            swing_no = massa * np.sqrt(((anterior - forca) ** 2).sum(axis=1))
+            swing = swing_no.sum()
+            traction = 0.5 * (massa * np.sqrt(((anterior + forca) ** 2).sum(axis=1))).sum()
+
+            jitter_estimado = 0.05 * math.sqrt(n)
+            jitter = self.jitterTolerance * max(math.sqrt(jitter_estimado),
+                                                min(10.0, jitter_estimado * traction / n ** 2))
+            if traction > 0 and swing / traction > 2.0:
+                if eficiencia > 0.05:
+                    eficiencia *= 0.5
+                jitter = max(jitter, self.jitterTolerance)
+            alvo = jitter * eficiencia * traction / swing if swing > 0 else velocidade * 1.5
+            if swing > jitter * traction:
+                if eficiencia > 0.05:
+                    eficiencia *= 0.7
+            elif velocidade < 1000:
+                eficiencia *= 1.3
+            velocidade += min(alvo - velocidade, 0.5 * velocidade)
+
+            # deslocamento de cada nó, freado pelo próprio swing
+            fator = velocidade / (1.0 + np.sqrt(velocidade * swing_no))
+            if self.adjustSizes:
+                modulo = np.sqrt((forca ** 2).sum(axis=1))
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    fator = np.where(modulo > 0, np.minimum(0.1 * fator * modulo, 10.0) / modulo, 0.0)
+            pos += forca * fator[:, None]
+
+            if feitas % JANELA_PARADA == 0:
+                espacamento = (float(np.ptp(pos, axis=0).max()) or 1.0) / math.sqrt(n)
+                deslocamento = np.sqrt(((pos - referencia) ** 2).sum(axis=1)).mean() / espacamento
+                referencia = pos.copy()
+                abaixo = abaixo + 1 if deslocamento < self.limiar_parada else 0
+                if abaixo >= 2:
+                    break
+
+        self.iteracoes = feitas
+        if feitas < iterations:
+            print(f"[INFO] ForceAtlas2 parou na iteração {feitas} de {iterations} "
+                  f"(deslocamento na janela: {deslocamento:.3f} espaçamentos)")
+        else:
+            print(f"[INFO] ForceAtlas2 chegou ao teto de {iterations} iterações sem assentar")
+        return pos
+
+    def forceatlas2_networkx_layout(self, G, pos=None, iterations=100, weight_attr="weight") -> dict:
+        nos = list(G)
+        indice = {x: i for i, x in enumerate(nos)}
+        triplas = [(indice[a], indice[b], w) for a, b, w in G.edges(data=weight_attr, default=1) if a != b]
+        u = np.array([a for a, _, _ in triplas], dtype=np.int64)
+        v = np.array([b for _, b, _ in triplas], dtype=np.int64)
+        peso = np.array([w for _, _, w in triplas], dtype=np.float64)
+        raio = np.array([G.nodes[x].get("size", 1.0) for x in nos], dtype=np.float64)
+        if pos is None:
+            inicial = np.random.default_rng(self.seed).random((len(nos), 2))
+        else:
+            inicial = np.array([pos[x] for x in nos], dtype=np.float64).reshape(-1, 2)
+        final = self.forceatlas2(inicial, u, v, peso, raio, iterations)
+        return dict(zip(nos, map(tuple, final.tolist())))
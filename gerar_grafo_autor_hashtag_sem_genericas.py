@@ -4,6 +4,16 @@ import numpy as np
 import matplotlib.pyplot as plt
 import networkx as nx
 
+from carregar_grafo import carregar_grafo
+from layout_grafo import (
+    FA2_ITER, FA2_PARAMS, USAR_CACHE_LAYOUT, caminho_layout, forceatlas2_layout, gravar_posicoes, ler_posicoes,
+    posicoes_iniciais,
+)
+from metricas_grafo import (
+    BACKEND_METRICAS, DELTA_BETWEENNESS, EPSILON_BETWEENNESS, K_BETWEENNESS, MODO_BETWEENNESS,
+    N_WORKERS_BETWEENNESS, SEED_BETWEENNESS, betweenness, comunidades, escolher_backend, graus,
+)
+
 
 PASTA_SAIDA = "02_autor_hashtag_sem_genericas"
 
@@ -24,28 +34,13 @@ FONTE_LABEL = 9
 
 COLORIR_POR = "tipo"
 
-SEED_FALLBACK = 7
+SEED_LAYOUT = 7
 
 NODE_SIZE_MIN = 60
 NODE_SIZE_MAX = 2800
 EDGE_W_MIN = 0.3
 EDGE_W_MAX = 4.5
 
-FA2_PARAMS = dict(
-    outboundAttractionDistribution=True,
-    linLogMode=False,
-    adjustSizes=True,
-    edgeWeightInfluence=1.0,
-    jitterTolerance=1.0,
-    barnesHutOptimize=True,
-    barnesHutTheta=1.2,
-    scalingRatio=10.0,
-    strongGravityMode=False,
-    gravity=1.0,
-    verbose=False
-)
-FA2_ITER = 2000
-
 
 def scale(values, vmin, vmax):
     values = np.asarray(values, dtype=float)
@@ -56,31 +51,6 @@ def scale(values, vmin, vmax):
     return vmin + (vmax - vmin) * (values - values.min()) / (values.max() - values.min())
 
 
-def try_forceatlas2_layout(G):
-    try:
-        from fa2 import ForceAtlas2 
-        fa2 = ForceAtlas2(**FA2_PARAMS)
-        pos = fa2.forceatlas2_networkx_layout(G, pos=None, iterations=FA2_ITER)
-        return pos, "forceatlas2"
-    except Exception:
-        pos = nx.spring_layout(G, seed=SEED_FALLBACK, k=0.9)
-        return pos, "spring_layout_fallback"
-
-
-def compute_modularity_classes(G):
-    try:
-        import community as community_louvain  # pip install python-louvain
-        part = community_louvain.best_partition(G, weight="weight")
-        return part, "louvain"
-    except Exception:
-        communities = list(nx.algorithms.community.greedy_modularity_communities(G, weight="weight"))
-        part = {}
-        for i, comm in enumerate(communities):
-            for n in comm:
-                part[n] = i
-        return part, "greedy_modularity_fallback"
-
-
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -90,48 +60,25 @@ def main():
     nodes_path = os.path.join(outdir, ARQ_NODES)
     edges_path = os.path.join(outdir, ARQ_EDGES)
 
-    if not os.path.exists(nodes_path):
-        raise FileNotFoundError(f"Não encontrei: {nodes_path}")
-    if not os.path.exists(edges_path):
-        raise FileNotFoundError(f"Não encontrei: {edges_path}")
-
-    nodes = pd.read_csv(nodes_path)
-    edges = pd.read_csv(edges_path)
-
-    for c in ["Id", "Type"]:
-        if c not in nodes.columns:
-            raise ValueError(f"{ARQ_NODES} precisa ter a coluna '{c}'")
-    for c in ["Source", "Target", "Weight"]:
-        if c not in edges.columns:
-            raise ValueError(f"{ARQ_EDGES} precisa ter a coluna '{c}'")
-
-    G = nx.Graph()
-
-    for _, r in nodes.iterrows():
-        node_id = r["Id"]
-        ntype = r["Type"]
-        freq = int(r["Frequency"]) if "Frequency" in nodes.columns and not pd.isna(r["Frequency"]) else 0
-        G.add_node(node_id, node_type=ntype, frequency=freq)
-
-    for _, r in edges.iterrows():
-        u = r["Source"]
-        v = r["Target"]
-        w = int(r["Weight"]) if not pd.isna(r["Weight"]) else 1
-        if u not in G:
-            G.add_node(u, node_type="author", frequency=0)
-        if v not in G:
-            G.add_node(v, node_type="hashtag", frequency=0)
-        G.add_edge(u, v, weight=w)
-
-
-    degree = dict(G.degree())
-    wdegree = dict(G.degree(weight="weight"))
-    betw = nx.betweenness_centrality(G, weight="weight", normalized=True)
-
-    part, part_method = compute_modularity_classes(G)
+    G = carregar_grafo(nodes_path, edges_path, tipo_peso="int", peso_ausente=1,
+                       tipos_novos=("author", "hashtag"), colunas_nos=("Id", "Type"))
+
+    backend = escolher_backend(BACKEND_METRICAS)
+    degree, wdegree = graus(G, backend)
+    betw, betw_modo = betweenness(
+        G, MODO_BETWEENNESS, K_BETWEENNESS, EPSILON_BETWEENNESS, DELTA_BETWEENNESS, SEED_BETWEENNESS,
+        N_WORKERS_BETWEENNESS, backend,
+    )
+    print(f"[INFO] Betweenness: {betw_modo}")
+
+    part, part_method = comunidades(G, backend)
     nx.set_node_attributes(G, part, "modularity_class")
 
-    pos, layout_method = try_forceatlas2_layout(G)
+    layout_path = caminho_layout(outdir, SAIDA_IMG)
+    pos_inicial = posicoes_iniciais(G, ler_posicoes(layout_path), SEED_LAYOUT) if USAR_CACHE_LAYOUT else None
+    pos, layout_method = forceatlas2_layout(G, FA2_PARAMS, FA2_ITER, SEED_LAYOUT, pos_inicial)
+    if USAR_CACHE_LAYOUT:
+        gravar_posicoes(layout_path, pos)
 
     node_list = list(G.nodes())
     edge_list = list(G.edges())
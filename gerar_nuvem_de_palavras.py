@@ -1,8 +1,13 @@
 import os
-import pandas as pd
+import re
+from collections import defaultdict
+import numpy as np
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 
+from armazem_tokens import armazem_existe, carregar_armazem
+from dados_limpos import colunas_dados_limpos, ler_dados_limpos
+
 PASTA_ENTRADA = "00_dados_limpos"
 ARQUIVO_ENTRADA = "cleaned_posts.csv"
 
@@ -19,40 +24,80 @@ LARGURA = 1600
 ALTURA = 900
 FUNDO_BRANCO = True
 
+def frequencias_como_texto(wc: WordCloud, contagens) -> dict:
+    # mesmo resultado de wc.process_text(" ".join(palavras)) com collocations=False, mas a partir
+    # de (palavra, contagem) na ordem da 1ª aparição: regexp, "'s", números, tamanho mínimo,
+    # stopwords, grafia mais comum de cada palavra e plural com "s" somado ao singular
+    padrao = wc.regexp if wc.regexp is not None else (r"\w[\w']*" if wc.min_word_length <= 1 else r"\w[\w']+")
+    stopwords = {w.lower() for w in wc.stopwords}
+    grafias = defaultdict(dict)
+    for palavra, c in contagens:
+        for w in re.findall(padrao, palavra):
+            if w.lower().endswith("'s"):
+                w = w[:-2]
+            if not wc.include_numbers and w.isdigit():
+                continue
+            if wc.min_word_length and len(w) < wc.min_word_length:
+                continue
+            if w.lower() in stopwords:
+                continue
+            grafias[w.lower()][w] = grafias[w.lower()].get(w, 0) + c
+
+    if wc.normalize_plurals:
+        for chave in list(grafias):
+            if chave.endswith("s") and not chave.endswith("ss") and chave[:-1] in grafias:
+                singular = grafias[chave[:-1]]
+                for w, c in grafias.pop(chave).items():
+                    singular[w[:-1]] = singular.get(w[:-1], 0) + c
+    return {max(g.items(), key=lambda x: x[1])[0]: sum(g.values()) for g in grafias.values()}
+
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    input_path = os.path.join(script_dir, PASTA_ENTRADA, ARQUIVO_ENTRADA)
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei: {input_path}")
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
 
     outdir = os.path.join(script_dir, PASTA_SAIDA)
     os.makedirs(outdir, exist_ok=True)
 
-    df = pd.read_csv(input_path)
-
-    if "tokens_str" in df.columns:
-        textos = df["tokens_str"].fillna("").astype(str).tolist()
-    elif "text_clean" in df.columns:
-        textos = df["text_clean"].fillna("").astype(str).tolist()
-    elif "text" in df.columns:
-        textos = df["text"].fillna("").astype(str).tolist()
-    else:
-        raise ValueError("O CSV precisa ter uma coluna 'tokens_str' ou 'text_clean' ou 'text'.")
-
-    texto_unico = " ".join(textos)
-
-    if REMOVER_GENERICAS and GENERICAS:
-        palavras = texto_unico.split()
-        palavras = [p for p in palavras if p.lower() not in GENERICAS]
-        texto_unico = " ".join(palavras)
-
     wc = WordCloud(
         width=LARGURA,
         height=ALTURA,
         background_color="white" if FUNDO_BRANCO else None,
         collocations=False, 
-    ).generate(texto_unico)
+    )
+
+    if armazem_existe(pasta_entrada):
+        # contagem direto nos ids do armazém (mmap), sem remontar o texto; o vocabulário está
+        # na ordem da 1ª aparição, a mesma em que o texto juntado apresentaria as palavras
+        tokens = carregar_armazem(pasta_entrada)
+        contagem = np.bincount(tokens.ids, minlength=len(tokens.vocab))
+        excluir = GENERICAS if REMOVER_GENERICAS else set()
+        contagens = (
+            (w, int(c)) for w, c in zip(tokens.vocab, contagem.tolist())
+            if c > 0 and w.lower() not in excluir
+        )
+        wc.generate_from_frequencies(frequencias_como_texto(wc, contagens))
+    else:
+        disponiveis = colunas_dados_limpos(pasta_entrada, ARQUIVO_ENTRADA)
+        coluna = next((c for c in ("tokens", "text_clean", "text") if c in disponiveis), None)
+        if coluna is None:
+            raise ValueError("Os dados limpos precisam ter uma coluna 'tokens' ou 'text_clean' ou 'text'.")
+
+        df = ler_dados_limpos(pasta_entrada, [coluna], ARQUIVO_ENTRADA)
+
+        if coluna == "tokens":
+            textos = [" ".join(toks) for toks in df["tokens"]]
+        else:
+            textos = df[coluna].fillna("").astype(str).tolist()
+
+        texto_unico = " ".join(textos)
+
+        if REMOVER_GENERICAS and GENERICAS:
+            palavras = texto_unico.split()
+            palavras = [p for p in palavras if p.lower() not in GENERICAS]
+            texto_unico = " ".join(palavras)
+
+        wc.generate(texto_unico)
 
     out_img = os.path.join(outdir, ARQ_SAIDA)
     plt.figure(figsize=(16, 9))
@@ -0,0 +1,93 @@
+import os
+import numpy as np
+
+from forceatlas2 import ForceAtlas2
+
+# Cache de posições por rede ("<imagem>.layout.npz" na pasta de saída) para partir a quente:
+# nós que já existiam começam onde estavam, nós novos perto dos vizinhos já posicionados; o
+# ForceAtlas2 (forceatlas2.py) para sozinho quando o layout assenta.
+
+RUIDO_NOVOS = 0.02       # espalhamento dos nós novos em volta da média dos vizinhos (fração da extensão)
+
+# padrões dos scripts gerar_grafo_*, que importam estes nomes e sobrescrevem só o que precisam.
+# adjustSizes fica desligado: o fa2 usado antes não implementava a opção, e ligá-la aqui mudaria
+# os desenhos em relação aos de antes
+FA2_PARAMS = dict(
+    outboundAttractionDistribution=True,
+    linLogMode=False,
+    adjustSizes=False,
+    edgeWeightInfluence=1.0,
+    jitterTolerance=1.0,
+    barnesHutOptimize=True,
+    barnesHutTheta=1.2,
+    scalingRatio=10.0,
+    strongGravityMode=False,
+    gravity=1.0,
+    verbose=False
+)
+FA2_ITER = 2000   # teto: para antes quando o layout assenta (ver forceatlas2.py)
+USAR_CACHE_LAYOUT = True   # parte das posições do último desenho desta rede
+
+
+def caminho_layout(outdir: str, saida_img: str) -> str:
+    return os.path.join(outdir, os.path.splitext(saida_img)[0] + ".layout.npz")
+
+
+def ler_posicoes(caminho: str) -> dict:
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with np.load(caminho, allow_pickle=False) as z:
+            return dict(zip(z["nos"].tolist(), map(tuple, z["xy"].tolist())))
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def gravar_posicoes(caminho: str, pos: dict):
+    # ids que não são texto não voltam iguais de um array unicode: esses ficam fora do cache
+    nos = [n for n in pos if isinstance(n, str)]
+    xy = np.array([pos[n] for n in nos], dtype=np.float64).reshape(-1, 2)
+    np.savez(caminho, nos=np.array(nos, dtype=str), xy=xy)
+
+
+def extensao(xy: np.ndarray) -> float:
+    if len(xy) == 0:
+        return 1.0
+    return float(np.ptp(xy, axis=0).max()) or 1.0
+
+
+def posicoes_iniciais(G, anteriores: dict, seed: int) -> dict | None:
+    # None quando nenhum nó do grafo tem posição guardada (layout do zero)
+    pos = {n: np.asarray(anteriores[n], dtype=np.float64) for n in G if n in anteriores}
+    if not pos:
+        return None
+
+    rng = np.random.default_rng(seed)
+    xy = np.array(list(pos.values()))
+    escala = extensao(xy)
+    faltam = [n for n in G if n not in pos]
+
+    # em ondas: quem tem vizinho posicionado vai para a média deles, e vira âncora da próxima onda
+    while faltam:
+        onda = {}
+        for n in faltam:
+            vizinhos = [pos[v] for v in G.neighbors(n) if v in pos]
+            if vizinhos:
+                onda[n] = np.mean(vizinhos, axis=0) + rng.normal(0.0, RUIDO_NOVOS * escala, 2)
+        if not onda:
+            break
+        pos.update(onda)
+        faltam = [n for n in faltam if n not in onda]
+
+    # componentes sem nenhum nó conhecido: sorteados dentro da caixa do layout anterior
+    minimo, maximo = xy.min(axis=0), xy.max(axis=0)
+    for n in faltam:
+        pos[n] = rng.uniform(minimo, maximo)
+    return {n: tuple(pos[n]) for n in G}
+
+
+def forceatlas2_layout(G, params: dict, iteracoes: int, seed: int, pos_inicial=None) -> tuple[dict, str]:
+    # ForceAtlas2 do projeto; com pos_inicial parte a quente do último desenho
+    fa2 = ForceAtlas2(seed=seed, **params)
+    pos = fa2.forceatlas2_networkx_layout(G, pos=pos_inicial, iterations=iteracoes)
+    return pos, "forceatlas2"
@@ -1,8 +1,16 @@
 
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 import pandas as pd
 
+import dados_limpos
+from deduplicacao import Deduplicador
+from armazem_tokens import EscritorArmazemTokens, armazem_existe
+from estado_incremental import EstadoIncremental
+
 ARQUIVO_ENTRADA = "posts-bbb26.csv"     
 PASTA_SAIDA = "00_dados_limpos"        
 
@@ -10,18 +18,60 @@ APLICAR_LOWERCASE = True
 FILTRAR_AGREGADORES = True
 REMOVER_VAZIOS = True
 GERAR_TOKENS = True                    
+GERAR_HASHTAGS = True          # colunas hashtags / hashtags_sem_genericas usadas pelos rede_*
+GERAR_ARMAZEM_TOKENS = True    # vocabulário + ids int32/offsets (CSR) para leitura via mmap
+
+DEDUPLICAR = False             # remove text_clean repetido e agrupa quase-duplicatas (MinHash/LSH)
+REMOVER_QUASE_DUPLICATAS = False
+LIMIAR_QUASE_DUPLICATA = 0.8   # Jaccard entre shingles de tokens
+K_SHINGLE = 3
+NUM_PERM_DEDUP = 64
+SEED_DEDUP = 7
+ARQUIVO_CLUSTERS = "clusters_quase_duplicatas.csv"
+ARQUIVO_ESTADO_DEDUP = "estado_deduplicacao.npz"   # continua a deduplicação no modo incremental
+
+MOTOR_LIMPEZA = "vetorizado"   # "vetorizado" (lote inteiro) ou "python" (apply por linha)
+
+FORMATO_SAIDA = "parquet"      # "parquet" (colunar, datas tipadas, tokens como lista) ou "csv"
+EXPORTAR_CSV = True            # com parquet, grava também o cleaned_posts.csv (Gephi)
+
+MODO_STREAMING = False
+TAMANHO_CHUNK = 50_000
+
+MODO_INCREMENTAL = False   # limpa só o que foi anexado ao CSV bruto desde a última execução
+ARQUIVO_ESTADO = "estado_incremental.json"
+JANELA_ATRASO_HORAS = 48   # no modo incremental, lembra os uri/cid com indexed_at >= watermark - janela
+
+N_WORKERS = 1             # >1 divide as linhas entre processos (ordem original preservada)
+SHARDS_POR_WORKER = 4
 
 AUTORES_AGREGADORES = {"nowbreezing.ntw.app", "hourlybreezing.ntw.app"}
 
 BLACKLIST_TOKENS = {"bbb", "bbb26", "redebbb"} 
 MIN_LEN_TOKEN = 3
 
+# tipos fixos na leitura: sem isso cada chunk infere os seus (ex.: int vira float
+# quando um chunk tem NaN) e a saída em streaming deixa de bater com a completa
+DTYPES_ENTRADA = {
+    "uri": str, "cid": str, "text": str,
+    "reply_count": "Int64", "repost_count": "Int64", "like_count": "Int64",
+    "author_handle": str, "author_display_name": str, "author_did": str,
+}
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S.%f+00:00"
+
 
 URL_RE = re.compile(r"https?://\S+|www\.\S+", flags=re.IGNORECASE)
 NON_WORD_RE = re.compile(r"[^\w#@À-ÖØ-öø-ÿ\s]", flags=re.UNICODE)
 MULTISPACE_RE = re.compile(r"\s+")
 TRENDING_RE = re.compile(r"trending words", flags=re.IGNORECASE)
 
+# separador entre posts no modo vetorizado: é espaço em branco para o \S+ da URL_RE
+# não atravessar de um post para o outro, e não é tocado pela NON_WORD_RE
+SEPARADOR_LOTE = "\x1e"
+# mesma coisa que a URL_RE, mas com a 1ª letra de cada ramo numa classe explícita: com
+# IGNORECASE no padrão todo o re não consegue pular direto para os candidatos e fica ~3x mais lento
+URL_LOTE_RE = re.compile(r"(?:[hH](?i:ttps?://)|[wW](?i:ww\.))\S+")
+
 STOPWORDS_PT = {
     "a","à","agora","ai","aí","ainda","além","algo","algum","alguma","algumas","alguns","ao","aos",
     "apenas","aqui","as","até","bem","boa","boas","bom","bons","cada","cadê","cê","cem","certo","como",
@@ -37,60 +87,313 @@ STOPWORDS_PT = {
     "rs","kkk","kkkk","kk","pq","porque","porquê","por que","p","q"
 }
 
-def clean_text(s: str) -> str:
+@dataclass(frozen=True)
+class ConfigLimpeza:
+    # tudo o que preparar_df lê das constantes do módulo; vai junto de cada shard para os workers
+    aplicar_lowercase: bool
+    filtrar_agregadores: bool
+    remover_vazios: bool
+    gerar_tokens: bool
+    gerar_hashtags: bool
+    motor: str
+    autores_agregadores: frozenset
+    tokens_excluidos: frozenset
+    min_len_token: int
+    hashtags_genericas: frozenset
+
+def config_limpeza() -> ConfigLimpeza:
+    # montada na hora, para pegar constantes sobrescritas (pipeline.py --set)
+    return ConfigLimpeza(
+        aplicar_lowercase=APLICAR_LOWERCASE,
+        filtrar_agregadores=FILTRAR_AGREGADORES,
+        remover_vazios=REMOVER_VAZIOS,
+        gerar_tokens=GERAR_TOKENS,
+        gerar_hashtags=GERAR_HASHTAGS,
+        motor=MOTOR_LIMPEZA,
+        autores_agregadores=frozenset(AUTORES_AGREGADORES),
+        tokens_excluidos=frozenset(STOPWORDS_PT | BLACKLIST_TOKENS),
+        min_len_token=MIN_LEN_TOKEN,
+        hashtags_genericas=frozenset(dados_limpos.HASHTAGS_GENERICAS),
+    )
+
+def clean_text(s: str, lowercase: bool | None = None) -> str:
+    lowercase = APLICAR_LOWERCASE if lowercase is None else lowercase
     s = "" if pd.isna(s) else str(s)
     s = URL_RE.sub(" ", s)
     s = NON_WORD_RE.sub(" ", s)
     s = MULTISPACE_RE.sub(" ", s).strip()
-    return s.lower() if APLICAR_LOWERCASE else s
+    return s.lower() if lowercase else s
 
-def tokenizar(texto_limpo: str):
+def tokenizar(texto_limpo: str, min_len: int | None = None, excluidos: frozenset | None = None):
+    min_len = MIN_LEN_TOKEN if min_len is None else min_len
+    excluidos = STOPWORDS_PT | BLACKLIST_TOKENS if excluidos is None else excluidos
     if not isinstance(texto_limpo, str):
         return []
-    toks = [t for t in texto_limpo.split() if len(t) >= MIN_LEN_TOKEN]
+    toks = [t for t in texto_limpo.split() if len(t) >= min_len]
     toks = [t for t in toks if not t.startswith("#") and not t.startswith("@")]
-    toks = [t for t in toks if t not in STOPWORDS_PT and t not in BLACKLIST_TOKENS]
+    toks = [t for t in toks if t not in excluidos]
     return toks
 
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, ARQUIVO_ENTRADA)
-    outdir_path = os.path.join(script_dir, PASTA_SAIDA)
-    os.makedirs(outdir_path, exist_ok=True)
+def limpar_lote(textos: pd.Series, lowercase: bool | None = None) -> pd.Series:
+    lowercase = APLICAR_LOWERCASE if lowercase is None else lowercase
+    lista = textos.where(textos.notna(), "").astype(str).tolist()
+    grande = SEPARADOR_LOTE.join(lista)
+    if grande.count(SEPARADOR_LOTE) != max(len(lista) - 1, 0):
+        return textos.apply(clean_text, lowercase=lowercase)
 
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei o arquivo: {input_path}")
+    grande = URL_LOTE_RE.sub(" ", grande)
+    grande = NON_WORD_RE.sub(" ", grande)
+    if lowercase:
+        grande = grande.lower()
+    limpos = [" ".join(p.split()) for p in grande.split(SEPARADOR_LOTE)] if lista else []
+    return pd.Series(limpos, index=textos.index, dtype=object)
 
-    df = pd.read_csv(input_path)
+def tokenizar_lote(textos_limpos: pd.Series, min_len: int | None = None,
+                   excluidos: frozenset | None = None) -> pd.Series:
+    min_len = MIN_LEN_TOKEN if min_len is None else min_len
+    excluidos = STOPWORDS_PT | BLACKLIST_TOKENS if excluidos is None else excluidos
+    tokens = []
+    for s in textos_limpos:
+        if not isinstance(s, str):
+            tokens.append([])
+            continue
+        tokens.append([
+            t for t in s.split()
+            if len(t) >= min_len and t[0] not in "#@" and t not in excluidos
+        ])
+    return pd.Series(tokens, index=textos_limpos.index, dtype=object)
 
-    
+def preparar_df(df: pd.DataFrame, config: ConfigLimpeza | None = None) -> pd.DataFrame:
+    config = config or config_limpeza()
     if "indexed_at" in df.columns:
-        df["indexed_at"] = pd.to_datetime(df["indexed_at"], errors="coerce", utc=True)
+        df["indexed_at"] = pd.to_datetime(df["indexed_at"], errors="coerce", utc=True, format="ISO8601")
     if "created_at" in df.columns:
-        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
+        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True, format="ISO8601")
 
    
     df["text"] = df["text"].astype(str)
-    df["text_clean"] = df["text"].apply(clean_text)
+    if config.motor == "vetorizado":
+        df["text_clean"] = limpar_lote(df["text"], config.aplicar_lowercase)
+    else:
+        df["text_clean"] = df["text"].apply(clean_text, lowercase=config.aplicar_lowercase)
 
     
-    if FILTRAR_AGREGADORES:
+    if config.filtrar_agregadores:
         if "author_handle" in df.columns:
-            df = df[~df["author_handle"].isin(AUTORES_AGREGADORES)].copy()
+            df = df[~df["author_handle"].isin(config.autores_agregadores)].copy()
         df = df[~df["text"].str.contains(TRENDING_RE, na=False)].copy()
 
 
-    if REMOVER_VAZIOS:
+    if config.remover_vazios:
         df = df[df["text_clean"].str.len() > 0].copy()
 
     
-    if GERAR_TOKENS:
-        df["tokens"] = df["text_clean"].apply(tokenizar)
-        df["tokens_str"] = df["tokens"].apply(lambda lst: " ".join(lst))
+    if config.gerar_tokens:
+        if config.motor == "vetorizado":
+            df["tokens"] = tokenizar_lote(df["text_clean"], config.min_len_token, config.tokens_excluidos)
+            df["tokens_str"] = [" ".join(lst) for lst in df["tokens"]]
+        else:
+            df["tokens"] = df["text_clean"].apply(tokenizar, min_len=config.min_len_token,
+                                                  excluidos=config.tokens_excluidos)
+            df["tokens_str"] = df["tokens"].apply(lambda lst: " ".join(lst))
+
+    if config.gerar_hashtags:
+        dados_limpos.adicionar_hashtags(df, genericas=config.hashtags_genericas)
+
+    return df
+
+def criar_pool(n_workers: int):
+    if n_workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=n_workers)
+
+def preparar_em_paralelo(df: pd.DataFrame, pool, n_shards: int, config: ConfigLimpeza | None = None) -> pd.DataFrame:
+    config = config or config_limpeza()
+    if pool is None or len(df) < 2:
+        return preparar_df(df, config)
+
+    n_shards = min(n_shards, len(df))
+    limites = [len(df) * i // n_shards for i in range(n_shards + 1)]
+    shards = [df.iloc[a:b] for a, b in zip(limites, limites[1:])]
+
+    partes = list(pool.map(preparar_df, shards, repeat(config)))
+    return pd.concat(partes)
+
+def colunas_entrada(input_path: str) -> list[str]:
+    with open(input_path, encoding="utf-8") as f:
+        return list(pd.read_csv(f, nrows=0).columns)
+
+def ler_entrada(input_path: str, chunksize: int | None = None):
+    colunas = colunas_entrada(input_path)
+    dtypes = {c: t for c, t in DTYPES_ENTRADA.items() if c in colunas}
+    return pd.read_csv(input_path, dtype=dtypes, chunksize=chunksize)
+
+def salvar_csv(df: pd.DataFrame, out_path: str, anexar: bool = False):
+    # colunas de lista sem "<col>_str" correspondente vão para o CSV já como "<col>_str"
+    listas = [c for c in dados_limpos.COLUNAS_LISTA if c in df.columns and f"{c}_str" not in df.columns]
+    if listas:
+        df = df.copy()
+        for c in listas:
+            df[c] = [" ".join(lst) for lst in df[c]]
+        df = df.rename(columns={c: f"{c}_str" for c in listas})
+    df.to_csv(
+        out_path,
+        mode="a" if anexar else "w",
+        header=not anexar,
+        index=False,
+        encoding="utf-8",
+        date_format=FORMATO_DATA,
+    )
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    input_path = os.path.join(script_dir, ARQUIVO_ENTRADA)
+    outdir_path = os.path.join(script_dir, PASTA_SAIDA)
+    os.makedirs(outdir_path, exist_ok=True)
+
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Não encontrei o arquivo: {input_path}")
+
+    out_path = os.path.join(outdir_path, dados_limpos.ARQUIVO_CSV)
+    estado_path = os.path.join(outdir_path, ARQUIVO_ESTADO)
+    dedup_path = os.path.join(outdir_path, ARQUIVO_ESTADO_DEDUP)
+    n_shards = N_WORKERS * SHARDS_POR_WORKER
+    janela = pd.Timedelta(hours=JANELA_ATRASO_HORAS)
+
+    usar_parquet = FORMATO_SAIDA == "parquet"
+    if usar_parquet and not dados_limpos.parquet_disponivel():
+        print("[AVISO] pyarrow não instalado: salvando apenas em CSV")
+        usar_parquet = False
+    usar_csv = not usar_parquet or EXPORTAR_CSV
+    usar_armazem = GERAR_TOKENS and GERAR_ARMAZEM_TOKENS
+
+    parametros_dedup = (NUM_PERM_DEDUP, LIMIAR_QUASE_DUPLICATA, K_SHINGLE, SEED_DEDUP, REMOVER_QUASE_DUPLICATAS)
+    estado = EstadoIncremental.carregar(estado_path) if MODO_INCREMENTAL else None
+    dedup = None
+    if estado is not None:
+        if DEDUPLICAR:
+            dedup = Deduplicador.carregar(dedup_path, *parametros_dedup)
+        saidas_ok = (
+            (not usar_parquet or dados_limpos.partes_parquet(outdir_path))
+            and (not usar_csv or os.path.exists(out_path))
+            and (not usar_armazem or armazem_existe(outdir_path))
+            and (not DEDUPLICAR or dedup is not None)
+        )
+        if not saidas_ok or not estado.posicao_valida(input_path):
+            print("[INFO] Estado incremental inválido (saída ou deduplicação ausente, ou CSV bruto reescrito): "
+                  "limpeza completa")
+            estado = None
+    incremental = estado is not None
+
+    if usar_parquet:
+        escritor = dados_limpos.EscritorParquet(outdir_path, anexar=incremental)
+    else:
+        escritor = None
+        dados_limpos.remover_parquet(outdir_path)
+    armazem = EscritorArmazemTokens(outdir_path, anexar=incremental) if usar_armazem else None
+
+    def gravar(df: pd.DataFrame, anexar: bool):
+        if escritor is not None:
+            escritor.escrever(df)
+        if armazem is not None:
+            armazem.adicionar(df["tokens"])
+        if usar_csv:
+            salvar_csv(df, out_path, anexar=anexar)
+
+    if DEDUPLICAR and not incremental:
+        dedup = Deduplicador(*parametros_dedup)
+
+    config = config_limpeza()
+
+    def preparar(df: pd.DataFrame) -> pd.DataFrame:
+        df = preparar_em_paralelo(df, pool, n_shards, config)
+        return dedup.processar(df) if dedup is not None else df
+
+    lidos = repetidos = 0
+
+    def ineditos(df: pd.DataFrame) -> pd.DataFrame:
+        # só com MODO_INCREMENTAL: uri|cid repetido no lote ou já visto na janela sai; a poda a
+        # cada lote deixa o seen-set do tamanho da janela, não do CSV
+        nonlocal lidos, repetidos
+        if estado is None:
+            return df
+        novos = estado.filtrar_novos(df)
+        estado.registrar(df)
+        estado.podar(janela)
+        lidos += len(df)
+        repetidos += len(df) - len(novos)
+        return novos
+
+    pool = criar_pool(N_WORKERS)
+    try:
+        total = 0
+        if incremental:
+            novos, fim = estado.ler_novas_linhas(input_path, DTYPES_ENTRADA)
+            novos = ineditos(novos)
+            if len(novos):
+                df = preparar(novos)
+                gravar(df, anexar=True)
+                total = len(df)
+            estado.avancar(input_path, fim)
+        else:
+            estado = EstadoIncremental(colunas_entrada(input_path)) if MODO_INCREMENTAL else None
+            fim = os.path.getsize(input_path)
+            if MODO_STREAMING:
+                for i, chunk in enumerate(ler_entrada(input_path, chunksize=TAMANHO_CHUNK)):
+                    chunk = ineditos(chunk)
+                    if i > 0 and not len(chunk):
+                        continue
+                    chunk = preparar(chunk)
+                    gravar(chunk, anexar=i > 0)
+                    total += len(chunk)
+            else:
+                df = ineditos(ler_entrada(input_path))
+                df = preparar(df)
+                gravar(df, anexar=False)
+                total = len(df)
+            if estado is not None:
+                estado.avancar(input_path, fim)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if escritor is not None:
+            escritor.fechar()
+        if armazem is not None:
+            armazem.fechar()
+
+    # fora do modo incremental nenhum estado fica para trás: um estado antigo apontaria para
+    # um offset de um CSV limpo que acabou de ser reescrito
+    if estado is not None:
+        estado.salvar(estado_path)
+    elif os.path.exists(estado_path):
+        os.remove(estado_path)
+    if dedup is not None and estado is not None:
+        dedup.salvar(dedup_path)
+    elif os.path.exists(dedup_path):
+        os.remove(dedup_path)
+
+    if dedup is not None:
+        relatorio = dedup.relatorio()
+        relatorio.to_csv(os.path.join(outdir_path, ARQUIVO_CLUSTERS), index=False, encoding="utf-8")
+        print(f"[INFO] Duplicatas exatas removidas: {dedup.exatas_removidas} | "
+              f"clusters de quase-duplicatas: {len(relatorio)} "
+              f"({int(relatorio['tamanho'].sum())} posts, maior: {int(relatorio['tamanho'].max()) if len(relatorio) else 0})"
+              + (f" | quase-duplicatas removidas: {dedup.quase_removidas}" if REMOVER_QUASE_DUPLICATAS else ""))
+
+    if incremental:
+        print(f"[OK] Incremental: {lidos} linhas novas no CSV bruto, {repetidos} já vistas, "
+              f"{total} posts limpos anexados")
+        return
+    if repetidos:
+        print(f"[INFO] Linhas com uri|cid repetido descartadas: {repetidos}")
 
-    out_path = os.path.join(outdir_path, "cleaned_posts.csv")
-    df.to_csv(out_path, index=False, encoding="utf-8")
-    print(f"[OK] Dataset limpo salvo em: {out_path} ({len(df)} linhas)")
+    destinos = []
+    if escritor is not None:
+        destinos.append(escritor.caminho)
+    if usar_csv:
+        destinos.append(out_path)
+    modo = ", streaming" if MODO_STREAMING else ""
+    print(f"[OK] Dataset limpo salvo em: {' e '.join(destinos)} ({total} linhas{modo})")
 
 if __name__ == "__main__":
     main()
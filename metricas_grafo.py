@@ -0,0 +1,216 @@
+import math
+import importlib
+import numpy as np
+import networkx as nx
+
+# Betweenness aproximada por pivôs (Brandes e Pich, 2007): soma as dependências de k origens
+# sorteadas e reescala por n / k. Com a betweenness normalizada, a contribuição de cada pivô
+# fica em [0, 1]; por Hoeffding + união sobre os n vértices, k >= ln(2n / delta) / (2 epsilon²)
+# garante erro absoluto <= epsilon em todos os nós com probabilidade >= 1 - delta.
+
+# Backends das métricas: "networkx" (sempre disponível), "scipy" (graus pela matriz de adjacência
+# esparsa) e "igraph" (graus, betweenness exata e Louvain em C). O que um backend não implementa
+# (betweenness aproximada, comunidades no scipy) roda no networkx; os valores seguem a mesma
+# convenção do networkx (peso como distância na betweenness, normalizada; laço conta 2 no grau).
+BACKENDS = ("networkx", "scipy", "igraph")
+MODULOS_BACKEND = {"networkx": "networkx", "scipy": "scipy.sparse", "igraph": "igraph"}
+
+MODOS_BETWEENNESS = ("exato", "aproximado", "auto")
+
+# padrões dos scripts gerar_grafo_*, que importam estes nomes e sobrescrevem só o que precisam:
+# "exato", "aproximado" (k pivôs sorteados) ou "auto" (aproximado só quando k < número de nós);
+# K_BETWEENNESS = None deriva k do erro máximo EPSILON_BETWEENNESS com prob. 1 - DELTA_BETWEENNESS
+MODO_BETWEENNESS = "exato"
+K_BETWEENNESS = None
+EPSILON_BETWEENNESS = 0.05
+DELTA_BETWEENNESS = 0.1
+SEED_BETWEENNESS = 7
+N_WORKERS_BETWEENNESS = 1   # >1 divide as origens da betweenness exata entre processos
+
+# "networkx", "scipy" (graus) ou "igraph" (graus, betweenness exata e Louvain); sem a
+# biblioteca instalada cai no networkx
+BACKEND_METRICAS = "networkx"
+
+BLOCOS_POR_WORKER = 4   # mais blocos que processos: as origens não custam todas o mesmo
+
+_GRAFO = None
+
+
+def _configurar_worker(G):
+    global _GRAFO
+    _GRAFO = G
+
+
+def _betweenness_origens(origens: list) -> dict:
+    # dependências acumuladas só a partir destas origens, já na escala da betweenness normalizada:
+    # a soma sobre uma partição das origens é a betweenness exata
+    return nx.betweenness_centrality_subset(_GRAFO, sources=origens, targets=list(_GRAFO),
+                                            normalized=True, weight="weight")
+
+
+def betweenness_paralela(G, n_workers: int) -> dict:
+    from concurrent.futures import ProcessPoolExecutor
+
+    nos = list(G)
+    n_blocos = min(n_workers * BLOCOS_POR_WORKER, len(nos))
+    blocos = [nos[i::n_blocos] for i in range(n_blocos)]
+
+    betw = dict.fromkeys(G, 0.0)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_configurar_worker, initargs=(G,)) as pool:
+        for parcial in pool.map(_betweenness_origens, blocos):
+            for v, b in parcial.items():
+                betw[v] += b
+    return betw
+
+
+def backend_disponivel(backend: str) -> bool:
+    try:
+        importlib.import_module(MODULOS_BACKEND[backend])
+        return True
+    except ImportError:
+        return False
+
+
+def escolher_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"BACKEND_METRICAS desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    if not backend_disponivel(backend):
+        print(f"[AVISO] {MODULOS_BACKEND[backend]} não instalado: métricas com networkx")
+        return "networkx"
+    return backend
+
+
+def arestas_indexadas(G) -> tuple[list, np.ndarray, np.ndarray, list]:
+    # (nós na ordem do grafo, origem, destino, pesos) com as pontas como índices em nós
+    nos = list(G)
+    indice = {n: i for i, n in enumerate(nos)}
+    triplas = list(G.edges(data="weight", default=1))
+    u = np.fromiter((indice[a] for a, _, _ in triplas), dtype=np.int64, count=len(triplas))
+    v = np.fromiter((indice[b] for _, b, _ in triplas), dtype=np.int64, count=len(triplas))
+    return nos, u, v, [w for _, _, w in triplas]
+
+
+def _como_dict(nos: list, valores: np.ndarray, inteiro: bool) -> dict:
+    valores = valores.astype(np.int64) if inteiro else valores.astype(np.float64)
+    return dict(zip(nos, valores.tolist()))
+
+
+def graus_networkx(G) -> tuple[dict, dict]:
+    return dict(G.degree()), dict(G.degree(weight="weight"))
+
+
+def graus_scipy(G) -> tuple[dict, dict]:
+    from scipy import sparse
+
+    nos, u, v, pesos = arestas_indexadas(G)
+    n = len(nos)
+    inteiro = all(isinstance(w, int) for w in pesos)
+    w = np.asarray(pesos, dtype=np.float64)
+    # triângulo superior + transposta: o laço (u == v) entra duas vezes na diagonal, como no networkx
+    A = sparse.coo_matrix((w, (u, v)), shape=(n, n)).tocsr()
+    A = A + A.T
+    B = sparse.coo_matrix((np.ones(len(u)), (u, v)), shape=(n, n)).tocsr()
+    B = B + B.T
+    return (_como_dict(nos, np.asarray(B.sum(axis=1)).ravel(), True),
+            _como_dict(nos, np.asarray(A.sum(axis=1)).ravel(), inteiro))
+
+
+def grafo_igraph(G):
+    import igraph as ig
+
+    nos, u, v, pesos = arestas_indexadas(G)
+    g = ig.Graph(n=len(nos), edges=list(zip(u.tolist(), v.tolist())), directed=False)
+    g.es["weight"] = [float(w) for w in pesos]
+    return g, nos, all(isinstance(w, int) for w in pesos)
+
+
+def graus_igraph(G) -> tuple[dict, dict]:
+    g, nos, inteiro = grafo_igraph(G)
+    return (_como_dict(nos, np.asarray(g.degree(), dtype=np.float64), True),
+            _como_dict(nos, np.asarray(g.strength(weights="weight"), dtype=np.float64), inteiro))
+
+
+MOTORES_GRAUS = {
+    "networkx": graus_networkx,
+    "scipy": graus_scipy,
+    "igraph": graus_igraph,
+}
+
+
+def graus(G, backend: str = "networkx") -> tuple[dict, dict]:
+    # (grau, grau ponderado) por nó
+    return MOTORES_GRAUS[backend](G)
+
+
+def betweenness_igraph(G) -> dict | None:
+    # igraph conta cada par {s, t} uma vez; a normalizada do networkx divide os pares ordenados por (n-1)(n-2)
+    g, nos, _ = grafo_igraph(G)
+    if g.ecount() and min(g.es["weight"]) <= 0:
+        print("[AVISO] igraph exige pesos positivos na betweenness: usando networkx")
+        return None
+    n = len(nos)
+    b = np.asarray(g.betweenness(weights="weight", directed=False), dtype=np.float64)
+    return dict(zip(nos, (2.0 * b / ((n - 1) * (n - 2))).tolist()))
+
+
+def comunidades_networkx(G) -> tuple[dict, str]:
+    try:
+        import community as community_louvain  # pip install python-louvain
+        part = community_louvain.best_partition(G, weight="weight")
+        return part, "louvain"
+    except Exception:
+        communities = list(nx.algorithms.community.greedy_modularity_communities(G, weight="weight"))
+        part = {}
+        for i, comm in enumerate(communities):
+            for n in comm:
+                part[n] = i
+        return part, "greedy_modularity_fallback"
+
+
+def comunidades_igraph(G) -> tuple[dict, str]:
+    g, nos, _ = grafo_igraph(G)
+    if g.ecount() and min(g.es["weight"]) < 0:
+        return comunidades_networkx(G)
+    membros = g.community_multilevel(weights="weight").membership
+    return dict(zip(nos, membros)), "louvain_igraph"
+
+
+MOTORES_COMUNIDADES = {
+    "networkx": comunidades_networkx,
+    "scipy": comunidades_networkx,
+    "igraph": comunidades_igraph,
+}
+
+
+def comunidades(G, backend: str = "networkx") -> tuple[dict, str]:
+    # (classe de modularidade por nó, método usado)
+    return MOTORES_COMUNIDADES[backend](G)
+
+
+def pivos_para_erro(n: int, epsilon: float, delta: float) -> int:
+    return math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))
+
+
+def betweenness(G, modo: str, k: int | None, epsilon: float, delta: float, seed: int,
+                n_workers: int = 1, backend: str = "networkx") -> tuple[dict, str]:
+    # devolve (betweenness por nó, descrição do modo usado) — "auto" só amostra quando k < n;
+    # a exata roda no igraph quando é o backend, senão divide as origens entre n_workers processos
+    if modo not in MODOS_BETWEENNESS:
+        raise ValueError(f"MODO_BETWEENNESS desconhecido: {modo} (opções: {', '.join(MODOS_BETWEENNESS)})")
+
+    n = G.number_of_nodes()
+    if modo != "exato" and n > 2:
+        k = k or pivos_para_erro(n, epsilon, delta)
+        if k < n:
+            betw = nx.betweenness_centrality(G, k=k, seed=seed, weight="weight", normalized=True)
+            return betw, f"aproximado(k={k},seed={seed})"
+        if modo == "aproximado":
+            print(f"[INFO] Betweenness: k={k} >= {n} nós, calculando exata")
+
+    if backend == "igraph" and n > 2:
+        betw = betweenness_igraph(G)
+        if betw is not None:
+            return betw, "exato(igraph)"
+    if n_workers > 1 and n > 2:
+        return betweenness_paralela(G, n_workers), "exato"
+    return nx.betweenness_centrality(G, weight="weight", normalized=True), "exato"
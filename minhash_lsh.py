@@ -0,0 +1,85 @@
+import zlib
+import numpy as np
+
+# h(x) = (a*x + b) mod PRIMO, com x < 2^32 (crc32) e a < 2^31: o produto cabe em uint64
+PRIMO = np.uint64(4294967311)
+VAZIO = np.uint64(np.iinfo(np.uint64).max)
+PERMS_POR_BLOCO = 8
+
+
+def hash_itens(itens) -> np.ndarray:
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in itens), dtype=np.uint64)
+
+
+def parametros_hash(n_perm: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**31, size=n_perm, dtype=np.uint64)
+    b = rng.integers(0, 2**32, size=n_perm, dtype=np.uint64)
+    return a, b
+
+
+def assinaturas(hashes: np.ndarray, offsets: np.ndarray, n_perm: int, seed: int) -> np.ndarray:
+    # hashes de todos os conjuntos concatenados; conjunto i = hashes[offsets[i]:offsets[i+1]]
+    n = len(offsets) - 1
+    sig = np.full((n, n_perm), VAZIO, dtype=np.uint64)
+    if len(hashes) == 0:
+        return sig
+
+    inicios = offsets[:-1]
+    nao_vazios = np.flatnonzero(np.diff(offsets) > 0)
+    a, b = parametros_hash(n_perm, seed)
+    for ini in range(0, n_perm, PERMS_POR_BLOCO):
+        fim = min(ini + PERMS_POR_BLOCO, n_perm)
+        valores = (a[ini:fim, None] * hashes[None, :] + b[ini:fim, None]) % PRIMO
+        sig[nao_vazios, ini:fim] = np.minimum.reduceat(valores, inicios[nao_vazios], axis=1).T
+    return sig
+
+
+def _probabilidade_candidato(s: np.ndarray, b: int, r: int) -> np.ndarray:
+    return 1.0 - (1.0 - s ** r) ** b
+
+
+def bandas_para_limiar(n_perm: int, limiar: float, peso_fn: float = 0.5) -> tuple[int, int]:
+    # (bandas, linhas por banda) que minimiza falsos positivos + falsos negativos em torno do limiar;
+    # peso_fn > 0.5 troca candidatos extras (verificados depois) por recall
+    s = np.linspace(0.0, 1.0, 201)
+    ds = s[1] - s[0]
+    melhor, erro_min = (1, n_perm), None
+    for b in range(1, n_perm + 1):
+        r = n_perm // b
+        p = _probabilidade_candidato(s, b, r)
+        fp = np.where(s < limiar, p, 0.0).sum() * ds
+        fn = np.where(s >= limiar, 1.0 - p, 0.0).sum() * ds
+        erro = (1.0 - peso_fn) * fp + peso_fn * fn
+        if erro_min is None or erro < erro_min:
+            melhor, erro_min = (b, r), erro
+    return melhor
+
+
+def chaves_bandas(sig: np.ndarray, bandas: int, linhas: int) -> list[list[bytes]]:
+    # uma chave (bytes) por banda para cada linha de sig
+    blocos = [np.ascontiguousarray(sig[:, i * linhas:(i + 1) * linhas]) for i in range(bandas)]
+    return [[bloco[j].tobytes() for bloco in blocos] for j in range(sig.shape[0])]
+
+
+def pares_candidatos(sig: np.ndarray, bandas: int, linhas: int) -> tuple[np.ndarray, np.ndarray]:
+    # pares (i < j) que caem no mesmo bucket em pelo menos uma banda, sem repetição e ordenados
+    n = sig.shape[0]
+    chaves = []
+    validos = np.flatnonzero(sig[:, 0] != VAZIO)
+    for i in range(bandas):
+        bloco = np.ascontiguousarray(sig[validos, i * linhas:(i + 1) * linhas])
+        _, grupo = np.unique(bloco.view(np.dtype((np.void, bloco.dtype.itemsize * linhas))), return_inverse=True)
+        grupo = grupo.ravel()
+        ordem = np.argsort(grupo, kind="stable")
+        cortes = np.flatnonzero(np.diff(grupo[ordem])) + 1
+        for membros in np.split(validos[ordem], cortes):
+            if len(membros) < 2:
+                continue
+            x, y = np.triu_indices(len(membros), k=1)
+            chaves.append(membros[x].astype(np.int64) * n + membros[y])
+    if not chaves:
+        vazio = np.zeros(0, dtype=np.int64)
+        return vazio, vazio
+    unicas = np.unique(np.concatenate(chaves))
+    return unicas // n, unicas % n
@@ -0,0 +1,111 @@
+import ast
+import sys
+import argparse
+import importlib
+
+# subcomando -> (módulo, descrição); o módulo (e pandas/networkx/matplotlib) só é
+# importado quando o subcomando roda, então --help não paga import de nada pesado
+SUBCOMANDOS = {
+    "clean": ("limpeza_preparacao_dataset", "limpa o CSV bruto e grava 00_dados_limpos"),
+    "hashtag-net": ("rede_hashtag_hashtag", "exporta a rede hashtag-hashtag para o Gephi"),
+    "word-net": ("rede_palavra_palavra", "exporta a rede palavra-palavra para o Gephi"),
+    "author-net": ("rede_autor_autor", "exporta a rede autor-autor para o Gephi"),
+    "author-hashtag-net": ("rede_autor_hashtag", "exporta a rede autor-hashtag para o Gephi"),
+    "temporal-net": ("rede_temporal", "exporta redes hashtag/palavra por janela deslizante de created_at"),
+    "wordcloud": ("gerar_nuvem_de_palavras", "gera a nuvem de palavras"),
+}
+
+GRAFOS_RENDER = {
+    "hashtag": "gerar_grafo_hashtags_sem_genericas",
+    "word": "gerar_grafo_palavra_palavra_sem_genericas",
+    "author": "gerar_grafo_autor_autor_sem_genericas",
+    "author-hashtag": "gerar_grafo_autor_hashtag_sem_genericas",
+}
+
+# opções de atalho -> constante do módulo
+OPCOES_CLEAN = {
+    "workers": "N_WORKERS",
+    "streaming": "MODO_STREAMING",
+    "incremental": "MODO_INCREMENTAL",
+    "chunk": "TAMANHO_CHUNK",
+    "formato": "FORMATO_SAIDA",
+}
+
+
+def valor_literal(texto: str):
+    try:
+        return ast.literal_eval(texto)
+    except (ValueError, SyntaxError):
+        return texto
+
+
+def ler_atribuicoes(itens: list[str]) -> dict:
+    config = {}
+    for item in itens:
+        nome, sep, valor = item.partition("=")
+        if not sep or not nome.isupper():
+            raise SystemExit(f"[ERRO] --set espera NOME=VALOR com NOME em maiúsculas, recebi: {item}")
+        config[nome] = valor_literal(valor)
+    return config
+
+
+def rodar_modulo(nome_modulo: str, config: dict):
+    modulo = importlib.import_module(nome_modulo)
+    for nome, valor in config.items():
+        if not hasattr(modulo, nome):
+            raise SystemExit(f"[ERRO] {nome_modulo} não tem a constante {nome}")
+        setattr(modulo, nome, valor)
+    modulo.main()
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pipeline.py",
+        description="Ponto de entrada único do pipeline (limpeza, redes, grafos e nuvem).",
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    for comando, (_, descricao) in SUBCOMANDOS.items():
+        p = sub.add_parser(comando, help=descricao, description=descricao)
+        if comando == "clean":
+            p.add_argument("--workers", type=int, help="processos para a limpeza (N_WORKERS)")
+            p.add_argument("--streaming", action="store_true", default=None, help="lê o CSV bruto em chunks")
+            p.add_argument("--incremental", action="store_true", default=None, help="limpa só as linhas novas")
+            p.add_argument("--chunk", type=int, help="linhas por chunk (TAMANHO_CHUNK)")
+            p.add_argument("--formato", choices=["parquet", "csv"], help="formato dos dados limpos")
+        p.add_argument("--set", action="append", default=[], metavar="NOME=VALOR",
+                       help="sobrescreve uma constante do módulo (pode repetir)")
+
+    p = sub.add_parser("render", help="desenha os grafos (PNG + estatísticas)",
+                       description="desenha os grafos (PNG + estatísticas)")
+    p.add_argument("grafos", nargs="*", metavar="GRAFO",
+                   help=f"um ou mais de: {', '.join(GRAFOS_RENDER)} (padrão: todos)")
+    p.add_argument("--set", action="append", default=[], metavar="NOME=VALOR",
+                   help="sobrescreve uma constante dos módulos de desenho (pode repetir)")
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = criar_parser().parse_args(argv)
+    config = ler_atribuicoes(args.set)
+
+    if args.comando == "render":
+        desconhecidos = [g for g in args.grafos if g not in GRAFOS_RENDER]
+        if desconhecidos:
+            raise SystemExit(f"[ERRO] grafo desconhecido: {', '.join(desconhecidos)} (use: {', '.join(GRAFOS_RENDER)})")
+        for grafo in args.grafos or list(GRAFOS_RENDER):
+            print(f"[INFO] render {grafo}")
+            rodar_modulo(GRAFOS_RENDER[grafo], config)
+        return
+
+    if args.comando == "clean":
+        for opcao, constante in OPCOES_CLEAN.items():
+            valor = getattr(args, opcao)
+            if valor is not None:
+                config[constante] = valor
+
+    rodar_modulo(SUBCOMANDOS[args.comando][0], config)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
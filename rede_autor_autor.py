@@ -1,26 +1,37 @@
 import os
-import re
+import math
+import bisect
 import itertools
+from collections import Counter, defaultdict
+import numpy as np
 import pandas as pd
 
+from backbone import filtrar_backbone
+from dados_limpos import ler_com_hashtags
+from minhash_lsh import assinaturas, bandas_para_limiar, hash_itens, pares_candidatos
+
 PASTA_ENTRADA = "00_dados_limpos"
 ARQUIVO_ENTRADA = "cleaned_posts.csv"
 
 PASTA_SAIDA = "04_gephi_autor_autor_sem_genericas"
 
-HASHTAGS_GENERICAS = {"#bbb", "#bbb26"}
-
 
 MIN_POSTS_AUTOR = 3           
 MIN_HASHTAGS_UNICAS = 2       
 MIN_SHARED_HASHTAGS = 2       
 MIN_JACCARD = 0.08           
 
-HASHTAG_RE = re.compile(r"#\w+", flags=re.UNICODE)
+# "exato" (todos os pares), "indice" (exato, índice invertido + filtro de prefixo)
+# ou "minhash" (candidatos por LSH, verificados exatamente; pode perder arestas)
+MODO_SIMILARIDADE = "indice"
+NUM_PERM_AUTOR = 128
+SEED_AUTOR = 7
+PESO_FALSO_NEGATIVO = 0.8     # peso dos falsos negativos na escolha das bandas LSH (0.5 = equilíbrio)
 
-def extract_hashtags(text: str) -> list[str]:
-    text = "" if pd.isna(text) else str(text)
-    return [t.lower() for t in HASHTAG_RE.findall(text)]
+# ver backbone.py; o peso usado é Shared (contagem de hashtags em comum), não o Jaccard
+APLICAR_BACKBONE = False
+METODO_BACKBONE = "disparidade"
+ALPHA_BACKBONE = 0.05
 
 def jaccard(a: set, b: set) -> float:
     if not a and not b:
@@ -29,68 +40,162 @@ def jaccard(a: set, b: set) -> float:
     union = len(a | b)
     return inter / union if union else 0.0
 
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, PASTA_ENTRADA, ARQUIVO_ENTRADA)
-
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei: {input_path}")
-
-    outdir = os.path.join(script_dir, PASTA_SAIDA)
-    os.makedirs(outdir, exist_ok=True)
-
-    df = pd.read_csv(input_path)
-
-    if "author_handle" not in df.columns:
-        raise ValueError("O CSV precisa ter a coluna 'author_handle'.")
-    if "text_clean" not in df.columns and "text" not in df.columns:
-        raise ValueError("O CSV precisa ter 'text_clean' ou 'text'.")
-
-    col_texto = "text_clean" if "text_clean" in df.columns else "text"
-    df["hashtags"] = df[col_texto].apply(extract_hashtags)
-
-    
-    df["hashtags"] = df["hashtags"].apply(lambda tags: [t for t in tags if t not in HASHTAGS_GENERICAS])
-
-   
+def tem_hashtags_unicas(listas_tags, minimo: int) -> bool:
+    # exato, guardando no máximo `minimo` hashtags distintas
+    vistas = set()
+    for tags in listas_tags:
+        for t in tags:
+            vistas.add(t)
+            if len(vistas) >= minimo:
+                return True
+    return len(vistas) >= minimo
+
+def conjuntos_autores(df: pd.DataFrame) -> tuple[dict, list[str], dict]:
     posts_por_autor = df.groupby("author_handle").size().to_dict()
 
+    # filtros antes dos conjuntos: os completos só são montados para os autores que passam
+    ativos = [a for a, n in posts_por_autor.items() if n >= MIN_POSTS_AUTOR]
+    df = df[df["author_handle"].isin(ativos)]
+    autores_validos = sorted(
+        autor for autor, tags in df.groupby("author_handle")["hashtags"]
+        if tem_hashtags_unicas(tags, MIN_HASHTAGS_UNICAS)
+    )
+    df = df[df["author_handle"].isin(autores_validos)]
+
     hashtags_por_autor = {}
     for autor, grp in df.groupby("author_handle"):
         s = set()
         for tags in grp["hashtags"]:
             s.update(tags)
         hashtags_por_autor[autor] = s
+    return posts_por_autor, autores_validos, hashtags_por_autor
 
-    autores_validos = []
-    for autor, n_posts in posts_por_autor.items():
-        if n_posts < MIN_POSTS_AUTOR:
-            continue
-        if len(hashtags_por_autor.get(autor, set())) < MIN_HASHTAGS_UNICAS:
-            continue
-        autores_validos.append(autor)
-
-    autores_validos = sorted(autores_validos)
-    hashtags_por_autor = {a: hashtags_por_autor[a] for a in autores_validos}
-
-    edges_rows = []
-    for a, b in itertools.combinations(autores_validos, 2):
-        ha = hashtags_por_autor[a]
-        hb = hashtags_por_autor[b]
+def verificar_conjuntos(autores: list[str], hashtags_por_autor: dict, pares):
+    for i, j in pares:
+        ha = hashtags_por_autor[autores[i]]
+        hb = hashtags_por_autor[autores[j]]
         shared = len(ha & hb)
         if shared < MIN_SHARED_HASHTAGS:
             continue
         jac = jaccard(ha, hb)
         if jac < MIN_JACCARD:
             continue
+        yield i, j, shared, jac
+
+def similares_exato(autores: list[str], hashtags_por_autor: dict):
+    return verificar_conjuntos(autores, hashtags_por_autor, itertools.combinations(range(len(autores)), 2))
+
+def pares_minhash(autores: list[str], hashtags_por_autor: dict):
+    # bandas ajustadas a MIN_JACCARD (favorecendo recall); candidatos são verificados com
+    # Jaccard exato, então só há falsos negativos. Recall medido em: benchmark_pipeline.py autores
+    conjuntos = [sorted(hashtags_por_autor[a]) for a in autores]
+    offsets = np.zeros(len(conjuntos) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in conjuntos], out=offsets[1:])
+    hashes = hash_itens(t for c in conjuntos for t in c)
+    sig = assinaturas(hashes, offsets, NUM_PERM_AUTOR, SEED_AUTOR)
+    bandas, linhas = bandas_para_limiar(NUM_PERM_AUTOR, MIN_JACCARD, PESO_FALSO_NEGATIVO)
+    a, b = pares_candidatos(sig, bandas, linhas)
+    return zip(a.tolist(), b.tolist())
+
+def similares_minhash(autores: list[str], hashtags_por_autor: dict):
+    return verificar_conjuntos(autores, hashtags_por_autor, pares_minhash(autores, hashtags_por_autor))
+
+def similares_indice(autores: list[str], hashtags_por_autor: dict):
+    # exato: índice invertido hashtag -> autores só sobre o prefixo de cada conjunto.
+    # Um par aceito tem overlap o >= MIN_SHARED e o >= MIN_JACCARD * |x| (a união é >= |x|);
+    # com alfa = esse mínimo, dois conjuntos com o >= alfa dividem alguma hashtag dos
+    # primeiros |x| - alfa + 1 itens na ordem global (mais rara primeiro)
+    if MIN_SHARED_HASHTAGS < 1 and MIN_JACCARD <= 0:
+        # pares sem hashtag em comum também passam: não há o que filtrar
+        yield from similares_exato(autores, hashtags_por_autor)
+        return
+
+    freq = Counter(t for a in autores for t in hashtags_por_autor[a])
+    ordem = sorted(freq, key=lambda t: (freq[t], t))
+    rank = {t: k for k, t in enumerate(ordem)}
+    conjuntos = [sorted(rank[t] for t in hashtags_por_autor[a]) for a in autores]
+
+    # conjuntos concatenados (ids int32 + offsets): memória do total de hashtags por autor
+    tamanhos = np.array([len(c) for c in conjuntos], dtype=np.int64)
+    offsets = np.zeros(len(conjuntos) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=offsets[1:])
+    ids = np.fromiter(itertools.chain.from_iterable(conjuntos), dtype=np.int32, count=int(offsets[-1]))
+    marcados = np.zeros(len(ordem), dtype=bool)
+
+    indice = defaultdict(list)
+    prefixos = []
+    for i, c in enumerate(conjuntos):
+        alfa = max(MIN_SHARED_HASHTAGS, math.ceil(MIN_JACCARD * len(c) - 1e-9), 1)
+        prefixo = c[:max(0, len(c) - alfa + 1)]
+        prefixos.append(prefixo)
+        for t in prefixo:
+            indice[t].append(i)
+
+    for i, prefixo in enumerate(prefixos):
+        candidatos = set()
+        for t in prefixo:
+            lista = indice[t]
+            candidatos.update(lista[bisect.bisect_right(lista, i):])
+        if not candidatos:
+            continue
+        # interseção de i com todos os candidatos de uma vez: marca as hashtags de i e conta,
+        # por candidato, quantos dos seus ids estão marcados
+        js = np.array(sorted(candidatos), dtype=np.int64)
+        n = tamanhos[js]
+        posicoes = np.repeat(offsets[js] - np.cumsum(n) + n, n) + np.arange(int(n.sum()))
+        marcados[conjuntos[i]] = True
+        shared = np.bincount(np.repeat(np.arange(len(js)), n), weights=marcados[ids[posicoes]],
+                             minlength=len(js)).astype(np.int64)
+        marcados[conjuntos[i]] = False
+        for j, s, n_j in zip(js.tolist(), shared.tolist(), n.tolist()):
+            if s < MIN_SHARED_HASHTAGS:
+                continue
+            jac = s / (len(conjuntos[i]) + n_j - s)
+            if jac < MIN_JACCARD:
+                continue
+            yield i, j, s, jac
+
+MOTORES_SIMILARIDADE = {
+    "exato": similares_exato,
+    "indice": similares_indice,
+    "minhash": similares_minhash,
+}
+
+def arestas_autores(autores: list[str], hashtags_por_autor: dict, modo: str) -> list[dict]:
+    if modo not in MOTORES_SIMILARIDADE:
+        raise ValueError(f"MODO_SIMILARIDADE desconhecido: {modo} (opções: {', '.join(MOTORES_SIMILARIDADE)})")
+
+    edges_rows = []
+    for i, j, shared, jac in MOTORES_SIMILARIDADE[modo](autores, hashtags_por_autor):
         edges_rows.append({
-            "Source": a,
-            "Target": b,
+            "Source": autores[i],
+            "Target": autores[j],
             "Weight": round(float(jac), 6),  
             "Shared": int(shared),
         })
+    return edges_rows
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
+
+    outdir = os.path.join(script_dir, PASTA_SAIDA)
+    os.makedirs(outdir, exist_ok=True)
+
+    df = ler_com_hashtags(pasta_entrada, ["author_handle"], ARQUIVO_ENTRADA)
+
+    if "author_handle" not in df.columns:
+        raise ValueError("O CSV precisa ter a coluna 'author_handle'.")
+
+    # hashtags já extraídas na limpeza, a partir do text_clean e sem as genéricas
+    df["hashtags"] = df["hashtags_sem_genericas"]
+
+    posts_por_autor, autores_validos, hashtags_por_autor = conjuntos_autores(df)
 
+    edges_rows = arestas_autores(autores_validos, hashtags_por_autor, MODO_SIMILARIDADE)
     edges = pd.DataFrame(edges_rows).sort_values(["Weight", "Shared"], ascending=False)
+    if APLICAR_BACKBONE:
+        edges = filtrar_backbone(edges, METODO_BACKBONE, ALPHA_BACKBONE, coluna="Shared")
 
     nodes_rows = []
     for a in autores_validos:
@@ -1,8 +1,10 @@
 import os
-import re
 from collections import Counter
 import pandas as pd
 
+from backbone import filtrar_backbone
+from dados_limpos import HASHTAGS_GENERICAS, ler_com_hashtags
+
 PASTA_ENTRADA = "00_dados_limpos"
 ARQUIVO_ENTRADA = "cleaned_posts.csv"
 
@@ -15,13 +17,11 @@ MIN_FREQ_HASHTAG = 3
 MIN_PESO_ARESTA = 2         
 MIN_POSTS_AUTOR = 3         
 
-HASHTAGS_GENERICAS = {"#bbb", "#bbb26"} 
-
-HASHTAG_RE = re.compile(r"#\w+", flags=re.UNICODE)
+MOTOR_CONTAGEM = "vetorizado"   # "vetorizado" (explode + groupby) ou "iterrows" (laço por linha)
 
-def extract_hashtags(text: str) -> list[str]:
-    text = "" if pd.isna(text) else str(text)
-    return [t.lower() for t in HASHTAG_RE.findall(text)]
+APLICAR_BACKBONE = False   # ver backbone.py
+METODO_BACKBONE = "disparidade"
+ALPHA_BACKBONE = 0.05
 
 def export_gephi(nodes: pd.DataFrame, edges: pd.DataFrame, outdir: str):
     os.makedirs(outdir, exist_ok=True)
@@ -33,21 +33,7 @@ def export_gephi(nodes: pd.DataFrame, edges: pd.DataFrame, outdir: str):
     print(f"     nós: {nodes_path} ({len(nodes)})")
     print(f"     arestas: {edges_path} ({len(edges)})")
 
-def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
-    
-    col_texto = "text" if "text" in df.columns else "text_clean"
-
-    if "author_handle" not in df.columns:
-        raise ValueError("CSV precisa ter a coluna 'author_handle'.")
-
-    
-    df["hashtags"] = df[col_texto].apply(extract_hashtags)
-
-    
-    if remover_genericas:
-        df["hashtags"] = df["hashtags"].apply(lambda tags: [t for t in tags if t not in HASHTAGS_GENERICAS])
-
-   
+def contar_iterrows(df: pd.DataFrame) -> tuple[dict, Counter, Counter]:
     posts_por_autor = df.groupby("author_handle").size()
     autores_validos = set(posts_por_autor[posts_por_autor >= MIN_POSTS_AUTOR].index)
     df = df[df["author_handle"].isin(autores_validos)].copy()
@@ -67,11 +53,51 @@ def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
 
     edge_counts = Counter({k: v for k, v in edge_counts.items() if v >= MIN_PESO_ARESTA})
 
+    posts_por_autor = df.groupby("author_handle").size().to_dict()
+    return posts_por_autor, freq_hashtag, edge_counts
+
+def contar_vetorizado(df: pd.DataFrame) -> tuple[dict, Counter, Counter]:
+    posts_por_autor = df.groupby("author_handle").size()
+    posts_por_autor = posts_por_autor[posts_por_autor >= MIN_POSTS_AUTOR]
+    df = df.loc[df["author_handle"].isin(posts_por_autor.index), ["author_handle", "hashtags"]]
+
+    # uma linha por (post, hashtag); o índice identifica o post
+    ocorrencias = df.reset_index(drop=True).explode("hashtags").dropna(subset=["hashtags"])
+
+    freq_hashtag = ocorrencias["hashtags"].value_counts()
+    freq_hashtag = freq_hashtag[freq_hashtag >= MIN_FREQ_HASHTAG]
+    ocorrencias = ocorrencias[ocorrencias["hashtags"].isin(freq_hashtag.index)]
+
+    # cada post conta uma vez por hashtag, como o set() da versão por linha
+    ocorrencias = ocorrencias.rename_axis("post").reset_index().drop_duplicates(["post", "hashtags"])
+    pesos = ocorrencias.groupby(["author_handle", "hashtags"]).size()
+    pesos = pesos[pesos >= MIN_PESO_ARESTA]
+
+    return (
+        posts_por_autor.to_dict(),
+        Counter(freq_hashtag.to_dict()),
+        Counter(pesos.to_dict()),
+    )
+
+def contar(df: pd.DataFrame) -> tuple[dict, Counter, Counter]:
+    if "author_handle" not in df.columns:
+        raise ValueError("CSV precisa ter a coluna 'author_handle'.")
+    if MOTOR_CONTAGEM == "iterrows":
+        return contar_iterrows(df)
+    return contar_vetorizado(df)
+
+def sem_genericas(posts_por_autor: dict, freq_hashtag: Counter, edge_counts: Counter):
+    # autores e contagens das outras hashtags não dependem das genéricas: basta tirá-las
+    freq_hashtag = Counter({k: v for k, v in freq_hashtag.items() if k not in HASHTAGS_GENERICAS})
+    edge_counts = Counter({(a, t): w for (a, t), w in edge_counts.items() if t not in HASHTAGS_GENERICAS})
+    return posts_por_autor, freq_hashtag, edge_counts
+
+def gerar_rede(posts_por_autor: dict, freq_hashtag: Counter, edge_counts: Counter, outdir: str):
     edges = pd.DataFrame(
         [{"Source": a, "Target": t, "Weight": int(w)} for (a, t), w in edge_counts.items()]
-    ).sort_values("Weight", ascending=False)
-
-    posts_por_autor = df.groupby("author_handle").size().to_dict()
+    ).sort_values(["Weight", "Source", "Target"], ascending=[False, True, True])
+    if APLICAR_BACKBONE:
+        edges = filtrar_backbone(edges, METODO_BACKBONE, ALPHA_BACKBONE)
 
     nodes_autores = pd.DataFrame(
         [{"Id": a, "Label": a, "Type": "author", "Frequency": int(n)} for a, n in posts_por_autor.items()]
@@ -79,7 +105,7 @@ def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
 
     nodes_tags = pd.DataFrame(
         [{"Id": t, "Label": t, "Type": "hashtag", "Frequency": int(n)} for t, n in freq_hashtag.items()]
-    )
+    ).sort_values(["Frequency", "Id"], ascending=[False, True])
 
     nodes = pd.concat([nodes_autores, nodes_tags], ignore_index=True)
 
@@ -87,20 +113,20 @@ def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, PASTA_ENTRADA, ARQUIVO_ENTRADA)
-
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei: {input_path}")
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
 
-    df = pd.read_csv(input_path)
+    # uma contagem só (com todas as hashtags); a versão sem genéricas é filtrada dela
+    df = ler_com_hashtags(pasta_entrada, ["author_handle"], ARQUIVO_ENTRADA, ("hashtags",))
+    contagens = contar(df)
+    del df
 
     if GERAR_VERSAO_COMPLETA:
         outdir = os.path.join(script_dir, "02_gephi_autor_hashtag")
-        gerar_rede(df.copy(), remover_genericas=False, outdir=outdir)
+        gerar_rede(*contagens, outdir=outdir)
 
     if GERAR_VERSAO_SEM_GENERICAS:
         outdir = os.path.join(script_dir, "02_gephi_autor_hashtag_sem_genericas")
-        gerar_rede(df.copy(), remover_genericas=True, outdir=outdir)
+        gerar_rede(*sem_genericas(*contagens), outdir=outdir)
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,16 @@
 
 
 import os
-import re
 import itertools
 from collections import Counter
+import numpy as np
 import pandas as pd
 
+from armazem_tokens import codificar
+from backbone import filtrar_backbone
+from coocorrencia import frequencias, incidencia, ordenar_vocab, pares, pares_em_disco, usar_esparso
+from dados_limpos import HASHTAGS_GENERICAS, ler_com_hashtags
+
 PASTA_ENTRADA = "00_dados_limpos"
 ARQUIVO_ENTRADA = "cleaned_posts.csv"
 
@@ -16,13 +21,16 @@ GERAR_VERSAO_SEM_GENERICAS = True
 MIN_FREQ_HASHTAG = 3
 MIN_PESO_ARESTA = 2
 
-HASHTAGS_GENERICAS = {"#bbb", "#bbb26"}
+MOTOR_COOCORRENCIA = "esparso"   # "esparso" (BᵀB com scipy), "counter" (combinations por post) ou "disco"
 
-HASHTAG_RE = re.compile(r"#\w+", flags=re.UNICODE)
+# modo "disco" (ver coocorrencia.pares_em_disco)
+LIMITE_PARES_MEMORIA = 5_000_000
+BLOCO_POSTS_DISCO = 50_000
+PASTA_TEMP_DISCO = None
 
-def extract_hashtags(text: str) -> list[str]:
-    text = "" if pd.isna(text) else str(text)
-    return [t.lower() for t in HASHTAG_RE.findall(text)]
+APLICAR_BACKBONE = False   # ver backbone.py
+METODO_BACKBONE = "disparidade"
+ALPHA_BACKBONE = 0.05
 
 def build_edges(tags_per_post: list[list[str]]) -> Counter:
     edges = Counter()
@@ -34,6 +42,41 @@ def build_edges(tags_per_post: list[list[str]]) -> Counter:
             edges[(u, v)] += 1
     return edges
 
+def contar_counter(tags_per_post) -> tuple[Counter, Counter]:
+    counts = Counter([h for tags in tags_per_post for h in tags])
+    counts = Counter({k: v for k, v in counts.items() if v >= MIN_FREQ_HASHTAG})
+
+    tags_per_post = [[t for t in tags if t in counts] for tags in tags_per_post]
+
+    edge_counts = build_edges(tags_per_post)
+    edge_counts = Counter({k: v for k, v in edge_counts.items() if v >= MIN_PESO_ARESTA})
+    return counts, edge_counts
+
+def contar_esparso(tags_per_post) -> tuple[Counter, Counter]:
+    tokens = ordenar_vocab(codificar(tags_per_post))
+    vocab = tokens.vocab
+    X = incidencia(tokens, binaria=False)
+
+    freq = frequencias(X)
+    colunas = np.flatnonzero(freq >= MIN_FREQ_HASHTAG)
+    counts = Counter({vocab[i]: int(freq[i]) for i in colunas})
+
+    a, b, w = pares(X, colunas, MIN_PESO_ARESTA)
+    edge_counts = Counter({(vocab[i], vocab[j]): int(c) for i, j, c in zip(a, b, w)})
+    return counts, edge_counts
+
+def contar_disco(tags_per_post) -> tuple[Counter, Counter]:
+    tokens = ordenar_vocab(codificar(tags_per_post))
+    vocab = tokens.vocab
+
+    freq = np.bincount(np.asarray(tokens.ids), minlength=len(vocab))
+    colunas = np.flatnonzero(freq >= MIN_FREQ_HASHTAG)
+    counts = Counter({vocab[i]: int(freq[i]) for i in colunas})
+
+    a, b, w = pares_em_disco(tokens, colunas, MIN_PESO_ARESTA, LIMITE_PARES_MEMORIA, BLOCO_POSTS_DISCO, PASTA_TEMP_DISCO)
+    edge_counts = Counter({(vocab[i], vocab[j]): int(c) for i, j, c in zip(a, b, w)})
+    return counts, edge_counts
+
 def export_gephi(nodes: pd.DataFrame, edges: pd.DataFrame, outdir: str):
     os.makedirs(outdir, exist_ok=True)
     nodes_path = os.path.join(outdir, "nodes_hashtag.csv")
@@ -44,50 +87,49 @@ def export_gephi(nodes: pd.DataFrame, edges: pd.DataFrame, outdir: str):
     print(f"     nós: {nodes_path} ({len(nodes)})")
     print(f"     arestas: {edges_path} ({len(edges)})")
 
-def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
-    
-    col_texto = "text" if "text" in df.columns else "text_clean"
-    df["hashtags"] = df[col_texto].apply(extract_hashtags)
-
-    if remover_genericas:
-        df["hashtags"] = df["hashtags"].apply(lambda tags: [t for t in tags if t not in HASHTAGS_GENERICAS])
-
-
-    counts = Counter([h for tags in df["hashtags"] for h in tags])
-    counts = Counter({k: v for k, v in counts.items() if v >= MIN_FREQ_HASHTAG})
-
-    tags_per_post = [[t for t in tags if t in counts] for tags in df["hashtags"]]
-
-    
-    edge_counts = build_edges(tags_per_post)
-    edge_counts = Counter({k: v for k, v in edge_counts.items() if v >= MIN_PESO_ARESTA})
+def sem_genericas(counts: Counter, edge_counts: Counter) -> tuple[Counter, Counter]:
+    # tirar as genéricas não muda a frequência das outras hashtags nem o peso dos pares entre elas
+    counts = Counter({k: v for k, v in counts.items() if k not in HASHTAGS_GENERICAS})
+    edge_counts = Counter({
+        (u, v): w for (u, v), w in edge_counts.items()
+        if u not in HASHTAGS_GENERICAS and v not in HASHTAGS_GENERICAS
+    })
+    return counts, edge_counts
 
+def gerar_rede(counts: Counter, edge_counts: Counter, outdir: str):
     nodes = pd.DataFrame(
         [{"Id": k, "Label": k, "Type": "hashtag", "Frequency": int(v)} for k, v in counts.items()]
-    ).sort_values("Frequency", ascending=False)
+    ).sort_values(["Frequency", "Id"], ascending=[False, True])
 
     edges = pd.DataFrame(
         [{"Source": u, "Target": v, "Weight": int(w)} for (u, v), w in edge_counts.items()]
-    ).sort_values("Weight", ascending=False)
+    ).sort_values(["Weight", "Source", "Target"], ascending=[False, True, True])
+    if APLICAR_BACKBONE:
+        edges = filtrar_backbone(edges, METODO_BACKBONE, ALPHA_BACKBONE)
 
     export_gephi(nodes, edges, outdir)
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, PASTA_ENTRADA, ARQUIVO_ENTRADA)
-
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei: {input_path}")
-
-    df = pd.read_csv(input_path)
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
+
+    # uma contagem só (com todas as hashtags); a versão sem genéricas é filtrada dela
+    df = ler_com_hashtags(pasta_entrada, [], ARQUIVO_ENTRADA, ("hashtags",))
+    if MOTOR_COOCORRENCIA == "disco":
+        counts, edge_counts = contar_disco(df["hashtags"])
+    elif usar_esparso(MOTOR_COOCORRENCIA):
+        counts, edge_counts = contar_esparso(df["hashtags"])
+    else:
+        counts, edge_counts = contar_counter(df["hashtags"])
+    del df
 
     if GERAR_VERSAO_COMPLETA:
         outdir = os.path.join(script_dir, "01_gephi_hashtags")
-        gerar_rede(df.copy(), remover_genericas=False, outdir=outdir)
+        gerar_rede(counts, edge_counts, outdir=outdir)
 
     if GERAR_VERSAO_SEM_GENERICAS:
         outdir = os.path.join(script_dir, "01_gephi_hashtags_sem_genericas")
-        gerar_rede(df.copy(), remover_genericas=True, outdir=outdir)
+        gerar_rede(*sem_genericas(counts, edge_counts), outdir=outdir)
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,18 @@
 import os
 import itertools
 from collections import Counter
+import numpy as np
 import pandas as pd
 
+from armazem_tokens import ArmazemTokens, armazem_existe, carregar_armazem, codificar, ler_termos
+from backbone import filtrar_backbone
+from coocorrencia import (
+    blocos_posts, frequencias, frequencias_por_post, incidencia, ordenar_vocab, pares, pares_em_disco,
+    pares_janela, usar_esparso,
+)
+from dados_limpos import colunas_dados_limpos, ler_dados_limpos
+from sketches import SpaceSaving
+
 PASTA_ENTRADA = "00_dados_limpos"
 ARQUIVO_ENTRADA = "cleaned_posts.csv"
 
@@ -14,12 +24,34 @@ MIN_FREQ_PALAVRA = 5
 MIN_PESO_ARESTA = 3      
 MAX_NOS = 300          
 
+MOTOR_COOCORRENCIA = "esparso"   # "esparso" (BᵀB com scipy), "counter" (combinations por post) ou "disco"
+
+# modo "disco" (ver coocorrencia.pares_em_disco)
+LIMITE_PARES_MEMORIA = 5_000_000
+BLOCO_POSTS_DISCO = 50_000
+PASTA_TEMP_DISCO = None
+
+MODO_COOCORRENCIA = "post"   # "post" (todo par de palavras do post) ou "janela" (até JANELA_K posições)
+JANELA_K = 5
+PESO_POR_DISTANCIA = False   # no modo janela, cada coocorrência vale 1/distância em vez de 1
+
+# "exata" conta todas as palavras; "sketch" acha as candidatas com Space-Saving em memória fixa
+# (CAPACIDADE_SKETCH contadores) e só reconta essas exatamente. Se os limites do sketch não
+# garantem que os nós são os mesmos do modo exato, cai para a contagem exata (ver sketches.py)
+SELECAO_NOS = "exata"
+CAPACIDADE_SKETCH = 5000
+BLOCO_POSTS_SKETCH = 100_000
+
+APLICAR_BACKBONE = False   # ver backbone.py
+METODO_BACKBONE = "disparidade"
+ALPHA_BACKBONE = 0.05
+
 
 TERMOS_GENERICOS = {
     "bbb", "bbb26", "redebbb", "globo", "bigday", "big", "day"
 }
 
-def build_edges(words_per_post: list[list[str]]) -> Counter:
+def build_edges(words_per_post) -> Counter:
     edges = Counter()
     for ws in words_per_post:
         uniq = sorted(set(ws))
@@ -39,66 +71,220 @@ def export_gephi(nodes: pd.DataFrame, edges: pd.DataFrame, outdir: str):
     print(f"     nós: {nodes_path} ({len(nodes)})")
     print(f"     arestas: {edges_path} ({len(edges)})")
 
-def gerar_rede(df: pd.DataFrame, remover_genericas: bool, outdir: str):
-    
-    if "tokens_str" in df.columns:
-        serie_tokens = df["tokens_str"].fillna("")
-    elif "text_clean" in df.columns:
-        
-        serie_tokens = df["text_clean"].fillna("")
+def sketch_por_post(tokens: ArmazemTokens) -> SpaceSaving:
+    # fluxo de (post, palavra) únicos, agregado por bloco de posts e passado ao Space-Saving
+    sketch = SpaceSaving(CAPACIDADE_SKETCH)
+    for _, posts, ids in blocos_posts(tokens, BLOCO_POSTS_SKETCH):
+        if not len(ids):
+            continue
+        base = int(ids.max()) + 1
+        itens, contagens = np.unique(np.unique(posts * base + ids) % base, return_counts=True)
+        sketch.adicionar(itens.tolist(), contagens.tolist())
+    return sketch
+
+def certificar_sketch(sketch: SpaceSaving) -> tuple[np.ndarray, bool]:
+    # candidatas: as palavras do sketch com estimativa >= MIN_FREQ_PALAVRA (a real não passa da
+    # estimativa). Fora do sketch a contagem real é <= maximo_fora; se isso fica abaixo do corte
+    # (o K-ésimo maior estimativa - erro, com K = MAX_NOS + folga, ou MIN_FREQ_PALAVRA), nenhuma
+    # palavra de fora entra entre os nós e a recontagem exata das candidatas dá a seleção exata
+    itens = sketch.itens()
+    candidatos = np.array(sorted(i for i, estimativa, _ in itens if estimativa >= MIN_FREQ_PALAVRA), dtype=np.int64)
+    garantidos = sorted((estimativa - erro for _, estimativa, erro in itens), reverse=True)
+    k = MAX_NOS + len(TERMOS_GENERICOS) if MAX_NOS else 0
+    garantido_k = garantidos[k - 1] if k and len(garantidos) >= k else 0
+    corte = max(garantido_k, MIN_FREQ_PALAVRA)
+    fora = sketch.maximo_fora
+    if k:
+        print(f"[INFO] Sketch: {len(itens)} contadores | {k}º candidato: estimativa - erro = {garantido_k} "
+              f"| palavra fora do sketch <= {fora}")
     else:
-        raise ValueError("CSV precisa ter 'tokens_str' (recomendado) ou 'text_clean'.")
+        print(f"[INFO] Sketch: {len(itens)} contadores | palavra fora do sketch <= {fora}")
+    return candidatos, fora < corte
 
-    words_per_post = []
-    for s in serie_tokens:
-        ws = [w for w in str(s).split() if w]
-        if remover_genericas:
-            ws = [w for w in ws if w not in TERMOS_GENERICOS]
-        words_per_post.append(ws)
+def compactar(tokens: ArmazemTokens, candidatos: np.ndarray, vocab: list[str], manter_posicoes: bool) -> ArmazemTokens:
+    # armazém só com as candidatas, renumeradas 0..C-1 (candidatos em ordem crescente de id). Com
+    # manter_posicoes as outras palavras viram o id C, que fica fora dos nós mas guarda a distância
+    c = len(candidatos)
+    partes, tamanhos = [], []
+    for n_posts, posts, ids in blocos_posts(tokens, BLOCO_POSTS_SKETCH):
+        local = np.searchsorted(candidatos, ids)
+        acerto = local < c
+        acerto[acerto] = candidatos[local[acerto]] == ids[acerto]
+        if manter_posicoes:
+            local[~acerto] = c
+            partes.append(local.astype(np.int32))
+            tamanhos.append(np.bincount(posts, minlength=n_posts))
+        else:
+            partes.append(local[acerto].astype(np.int32))
+            tamanhos.append(np.bincount(posts[acerto], minlength=n_posts))
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    if tamanhos:
+        np.cumsum(np.concatenate(tamanhos), out=offsets[1:])
+    ids = np.concatenate(partes) if partes else np.zeros(0, dtype=np.int32)
+    primeira = tokens.ordem_primeira()[candidatos] if tokens.primeira is not None else candidatos
+    if manter_posicoes:
+        vocab = vocab + [""]
+        primeira = np.append(primeira, np.iinfo(np.int64).max)
+    return ArmazemTokens(vocab, ids, offsets, primeira)
 
-    freq = Counter()
-    for ws in words_per_post:
-        for w in set(ws):
-            freq[w] += 1
+def selecionar_nos(freq_ids: np.ndarray, tokens: ArmazemTokens) -> np.ndarray:
+    # ranking por -freq com folga de |TERMOS_GENERICOS|: os MAX_NOS primeiros não genéricos
+    # (versão sem genéricas) e os MAX_NOS primeiros (versão completa) estão sempre aqui dentro.
+    # Empates na ordem de 1ª ocorrência, como o Counter.most_common da versão original
+    primeira = tokens.ordem_primeira()
+    candidatos = np.flatnonzero(freq_ids >= MIN_FREQ_PALAVRA)
+    candidatos = sorted(candidatos, key=lambda i: (-freq_ids[i], primeira[i]))
+    if MAX_NOS:
+        candidatos = candidatos[:MAX_NOS + len(TERMOS_GENERICOS)]
+    return np.asarray(candidatos, dtype=np.int64)
+
+def contar_counter(tokens: ArmazemTokens):
+    vocab = tokens.vocab
+    n_vocab = len(vocab)
+
+    # pares (post, palavra) únicos, ordenados por post e depois por id
+    chaves = np.unique(tokens.posts() * n_vocab + np.asarray(tokens.ids, dtype=np.int64))
+    posts_u, ids_u = chaves // n_vocab, chaves % n_vocab
+
+    freq_ids = np.bincount(ids_u, minlength=n_vocab)
+    candidatos = selecionar_nos(freq_ids, tokens)
+
+    selecionados = np.zeros(n_vocab, dtype=bool)
+    selecionados[candidatos] = True
+    sel = selecionados[ids_u]
+    posts_u, ids_u = posts_u[sel], ids_u[sel]
+    cortes = np.flatnonzero(np.diff(posts_u)) + 1
+    words_per_post = np.split(ids_u, cortes) if len(ids_u) else []
+
+    edge_counts = Counter()
+    for (a, b), w in build_edges(words_per_post).items():
+        if w >= MIN_PESO_ARESTA:
+            u, v = vocab[a], vocab[b]
+            edge_counts[(u, v) if u < v else (v, u)] = w
+    return [(vocab[i], int(freq_ids[i])) for i in candidatos], edge_counts
+
+def contar_esparso(tokens: ArmazemTokens):
+    tokens = ordenar_vocab(tokens)
+    vocab = tokens.vocab
+    X = incidencia(tokens, binaria=True)
 
-    freq = Counter({k: v for k, v in freq.items() if v >= MIN_FREQ_PALAVRA})
+    freq_ids = frequencias(X)
+    candidatos = selecionar_nos(freq_ids, tokens)
 
-    if MAX_NOS and len(freq) > MAX_NOS:
-        top = dict(freq.most_common(MAX_NOS))
-        freq = Counter(top)
+    a, b, w = pares(X, candidatos, MIN_PESO_ARESTA)
+    edge_counts = Counter({(vocab[i], vocab[j]): int(c) for i, j, c in zip(a, b, w)})
+    return [(vocab[i], int(freq_ids[i])) for i in candidatos], edge_counts
 
-    words_per_post = [[w for w in ws if w in freq] for ws in words_per_post]
+def contar_disco(tokens: ArmazemTokens):
+    tokens = ordenar_vocab(tokens, PASTA_TEMP_DISCO)
+    vocab = tokens.vocab
 
+    freq_ids = frequencias_por_post(tokens, BLOCO_POSTS_DISCO)
+    candidatos = selecionar_nos(freq_ids, tokens)
 
-    edge_counts = build_edges(words_per_post)
-    edge_counts = Counter({k: v for k, v in edge_counts.items() if v >= MIN_PESO_ARESTA})
+    a, b, w = pares_em_disco(tokens, candidatos, MIN_PESO_ARESTA, LIMITE_PARES_MEMORIA, BLOCO_POSTS_DISCO, PASTA_TEMP_DISCO)
+    edge_counts = Counter({(vocab[i], vocab[j]): int(c) for i, j, c in zip(a, b, w)})
+    return [(vocab[i], int(freq_ids[i])) for i in candidatos], edge_counts
+
+def contar_janela(tokens: ArmazemTokens, mascara: np.ndarray | None = None):
+    # a ordem dos tokens no post é a de tokenizar; o peso conta ocorrências dentro da janela, não posts
+    if mascara is not None:
+        # a máscara vem nos ids de entrada: acompanha a renumeração de ordenar_vocab
+        mascara = mascara[sorted(range(len(tokens.vocab)), key=tokens.vocab.__getitem__)]
+    tokens = ordenar_vocab(tokens)
+    vocab = tokens.vocab
+
+    freq_ids = frequencias_por_post(tokens if mascara is None else tokens.filtrar(mascara))
+    candidatos = selecionar_nos(freq_ids, tokens)
+
+    a, b, w = pares_janela(tokens, candidatos, JANELA_K, PESO_POR_DISTANCIA)
+    manter = w >= MIN_PESO_ARESTA
+    edge_counts = Counter({
+        (vocab[i], vocab[j]): round(float(c), 6) if PESO_POR_DISTANCIA else int(c)
+        for i, j, c in zip(a[manter], b[manter], w[manter])
+    })
+    return [(vocab[i], int(freq_ids[i])) for i in candidatos], edge_counts
+
+def contar(tokens: ArmazemTokens):
+    if MODO_COOCORRENCIA == "janela":
+        return contar_janela(tokens)
+    return contar_por_post(tokens)
+
+def contar_por_post(tokens: ArmazemTokens):
+    if MOTOR_COOCORRENCIA == "disco":
+        return contar_disco(tokens)
+    if usar_esparso(MOTOR_COOCORRENCIA):
+        return contar_esparso(tokens)
+    return contar_counter(tokens)
+
+def contar_com_sketch(pasta_entrada: str):
+    # o vocabulário inteiro não é carregado: só os termos das candidatas
+    tokens = carregar_tokens(pasta_entrada, com_vocab=False)
+    candidatos, certificado = certificar_sketch(sketch_por_post(tokens))
+    if not certificado:
+        print("[AVISO] Os limites do sketch não garantem a seleção exata dos nós: contando tudo exatamente "
+              "(aumente CAPACIDADE_SKETCH)")
+        return contar(carregar_tokens(pasta_entrada))
+
+    vocab = ler_termos(pasta_entrada, candidatos) if tokens.vocab is None else [tokens.vocab[i] for i in candidatos]
+    # no modo janela as posições contam, então as outras palavras continuam no fluxo (só não viram nós)
+    janela = MODO_COOCORRENCIA == "janela"
+    tokens = compactar(tokens, candidatos, vocab, manter_posicoes=janela)
+    if janela:
+        mascara = np.ones(len(tokens.vocab), dtype=bool)
+        mascara[-1] = False
+        return contar_janela(tokens, mascara)
+    return contar_por_post(tokens)
+
+def gerar_rede(ranking: list[tuple[str, int]], edge_counts: Counter, remover_genericas: bool, outdir: str):
+    # as duas versões saem da mesma contagem: tirar as genéricas não muda a frequência
+    # nem o peso dos pares entre as demais palavras
+    if remover_genericas:
+        ranking = [(w, c) for w, c in ranking if w not in TERMOS_GENERICOS]
+    freq = dict(ranking[:MAX_NOS] if MAX_NOS else ranking)
 
     nodes = pd.DataFrame(
         [{"Id": w, "Label": w, "Type": "word", "Frequency": int(c)} for w, c in freq.items()]
-    ).sort_values("Frequency", ascending=False)
+    ).sort_values(["Frequency", "Id"], ascending=[False, True])
 
     edges = pd.DataFrame(
-        [{"Source": u, "Target": v, "Weight": int(w)} for (u, v), w in edge_counts.items()]
-    ).sort_values("Weight", ascending=False)
+        [{"Source": u, "Target": v, "Weight": w} for (u, v), w in edge_counts.items() if u in freq and v in freq]
+    ).sort_values(["Weight", "Source", "Target"], ascending=[False, True, True])
+    if APLICAR_BACKBONE:
+        edges = filtrar_backbone(edges, METODO_BACKBONE, ALPHA_BACKBONE)
 
     export_gephi(nodes, edges, outdir)
 
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    input_path = os.path.join(script_dir, PASTA_ENTRADA, ARQUIVO_ENTRADA)
+def carregar_tokens(pasta_entrada: str, com_vocab: bool = True) -> ArmazemTokens:
+    if armazem_existe(pasta_entrada):
+        return carregar_armazem(pasta_entrada, com_vocab)
 
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Não encontrei: {input_path}")
+    disponiveis = colunas_dados_limpos(pasta_entrada, ARQUIVO_ENTRADA)
+    if "tokens" in disponiveis:
+        df = ler_dados_limpos(pasta_entrada, ["tokens"], ARQUIVO_ENTRADA)
+        serie_tokens = df["tokens"]
+    elif "text_clean" in disponiveis:
+        df = ler_dados_limpos(pasta_entrada, ["text_clean"], ARQUIVO_ENTRADA)
+        serie_tokens = df["text_clean"].fillna("").astype(str).str.split()
+    else:
+        raise ValueError("Dados limpos precisam ter 'tokens' (recomendado) ou 'text_clean'.")
+    return codificar([w for w in toks if w] for toks in serie_tokens)
 
-    df = pd.read_csv(input_path)
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
+    if SELECAO_NOS == "sketch":
+        ranking, edge_counts = contar_com_sketch(pasta_entrada)
+    else:
+        ranking, edge_counts = contar(carregar_tokens(pasta_entrada))
 
     if GERAR_VERSAO_COMPLETA:
         outdir = os.path.join(script_dir, "03_gephi_palavras")
-        gerar_rede(df.copy(), remover_genericas=False, outdir=outdir)
+        gerar_rede(ranking, edge_counts, remover_genericas=False, outdir=outdir)
 
     if GERAR_VERSAO_SEM_GENERICAS:
         outdir = os.path.join(script_dir, "03_gephi_palavras_sem_genericas")
-        gerar_rede(df.copy(), remover_genericas=True, outdir=outdir)
+        gerar_rede(ranking, edge_counts, remover_genericas=True, outdir=outdir)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,193 @@
+import os
+import itertools
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+from armazem_tokens import ArmazemTokens, codificar
+from coocorrencia import incidencia, ordenar_vocab, usar_esparso
+from dados_limpos import ler_com_hashtags, ler_dados_limpos
+from rede_palavra_palavra import TERMOS_GENERICOS, carregar_tokens
+
+PASTA_ENTRADA = "00_dados_limpos"
+ARQUIVO_ENTRADA = "cleaned_posts.csv"
+
+PASTA_SAIDA = "05_gephi_temporal"
+
+REDES = ("hashtag", "palavra")
+REMOVER_GENERICAS = True
+
+# posts agrupados em buckets de created_at; cada janela cobre JANELA_BUCKETS buckets
+# e anda PASSO_BUCKETS por vez (ex.: "1h" x 24 = últimas 24 horas, atualizada de hora em hora)
+TAMANHO_BUCKET = "1h"
+JANELA_BUCKETS = 24
+PASSO_BUCKETS = 1
+
+MIN_FREQ_JANELA = 2
+MIN_PESO_JANELA = 2
+MAX_NOS_JANELA = 300     # só na rede de palavras; 0 = sem limite
+
+MOTOR_COOCORRENCIA = "esparso"   # "esparso" (BᵀB por bucket com scipy) ou "counter"
+
+
+def buckets_posts(created_at: pd.Series) -> tuple[np.ndarray, pd.Timestamp]:
+    # índice do bucket de cada post (-1 sem data) e início do bucket 0
+    passo = pd.Timedelta(TAMANHO_BUCKET)
+    datas = pd.to_datetime(created_at, errors="coerce", utc=True)
+    if datas.notna().sum() == 0:
+        return np.full(len(datas), -1, dtype=np.int64), None
+    inicio = datas.min().floor(passo)
+    buckets = ((datas - inicio) // passo).fillna(-1).to_numpy(dtype=np.int64)
+    return buckets, inicio
+
+
+def deltas_esparso(tokens: ArmazemTokens, buckets: np.ndarray, contar_repeticoes: bool) -> dict:
+    X = incidencia(tokens, binaria=not contar_repeticoes)
+    B = X.copy()
+    B.data[:] = 1
+    n_vocab = len(tokens.vocab)
+
+    deltas = {}
+    ordem = np.argsort(buckets, kind="stable")
+    ordem = ordem[buckets[ordem] >= 0]
+    cortes = np.flatnonzero(np.diff(buckets[ordem])) + 1
+    for linhas in np.split(ordem, cortes) if len(ordem) else []:
+        freq = np.asarray(X[linhas].sum(axis=0)).ravel()
+        ids = np.flatnonzero(freq)
+        Bb = B[linhas]
+        C = (Bb.T @ Bb).tocoo()
+        acima = C.row < C.col
+        chaves = C.row[acima].astype(np.int64) * n_vocab + C.col[acima]
+        deltas[int(buckets[linhas[0]])] = (
+            dict(zip(ids.tolist(), freq[ids].tolist())),
+            dict(zip(chaves.tolist(), C.data[acima].tolist())),
+        )
+    return deltas
+
+
+def deltas_counter(tokens: ArmazemTokens, buckets: np.ndarray, contar_repeticoes: bool) -> dict:
+    n_vocab = len(tokens.vocab)
+    deltas = {}
+    for p in range(len(tokens)):
+        b = int(buckets[p])
+        if b < 0:
+            continue
+        freq, pares = deltas.setdefault(b, (Counter(), Counter()))
+        ids = tokens.ids[tokens.offsets[p]:tokens.offsets[p + 1]].tolist()
+        uniq = sorted(set(ids))
+        freq.update(ids if contar_repeticoes else uniq)
+        pares.update(u * n_vocab + v for u, v in itertools.combinations(uniq, 2))
+    return deltas
+
+
+def aplicar(janela: dict, delta: dict, sinal: int):
+    for chave, valor in delta.items():
+        novo = janela.get(chave, 0) + sinal * valor
+        if novo:
+            janela[chave] = novo
+        else:
+            del janela[chave]
+
+
+def exportar_janela(janela_freq: dict, janela_pares: dict, vocab: list[str], limitar_nos: bool,
+                    rotulo: dict, linhas_nos: list, linhas_arestas: list):
+    nos = {i: f for i, f in janela_freq.items() if f >= MIN_FREQ_JANELA}
+    if limitar_nos and MAX_NOS_JANELA and len(nos) > MAX_NOS_JANELA:
+        escolhidos = sorted(nos, key=lambda i: (-nos[i], vocab[i]))[:MAX_NOS_JANELA]
+        nos = {i: nos[i] for i in escolhidos}
+
+    n_vocab = len(vocab)
+    for i in sorted(nos, key=lambda i: (-nos[i], i)):
+        linhas_nos.append({**rotulo, "Id": vocab[i], "Label": vocab[i], "Frequency": int(nos[i])})
+
+    arestas = []
+    for chave, w in janela_pares.items():
+        if w < MIN_PESO_JANELA:
+            continue
+        u, v = divmod(chave, n_vocab)
+        if u in nos and v in nos:
+            arestas.append((-w, chave))
+    for w, chave in sorted(arestas):
+        u, v = divmod(chave, n_vocab)
+        linhas_arestas.append({**rotulo, "Source": vocab[u], "Target": vocab[v], "Weight": int(-w)})
+
+
+def gerar_rede_temporal(tokens: ArmazemTokens, created_at: pd.Series, rede: str, contar_repeticoes: bool,
+                        limitar_nos: bool, outdir: str):
+    tokens = ordenar_vocab(tokens)
+    vocab = tokens.vocab
+    buckets, inicio = buckets_posts(created_at)
+    if inicio is None:
+        print(f"[AVISO] Nenhum post com created_at: rede temporal de {rede} não gerada")
+        return
+
+    if usar_esparso(MOTOR_COOCORRENCIA):
+        deltas = deltas_esparso(tokens, buckets, contar_repeticoes)
+    else:
+        deltas = deltas_counter(tokens, buckets, contar_repeticoes)
+
+    # janela deslizante: entra o bucket novo, sai o que expirou; cada passo custa só os dois deltas.
+    # As primeiras janelas começam antes do primeiro post e cobrem menos buckets
+    passo = pd.Timedelta(TAMANHO_BUCKET)
+    janela_freq, janela_pares = {}, {}
+    linhas_nos, linhas_arestas = [], []
+    n_janelas = 0
+    ultimo = int(buckets.max())
+    for fim in range(0, ultimo + 1):
+        if fim in deltas:
+            aplicar(janela_freq, deltas[fim][0], 1)
+            aplicar(janela_pares, deltas[fim][1], 1)
+        saiu = fim - JANELA_BUCKETS
+        if saiu in deltas:
+            aplicar(janela_freq, deltas[saiu][0], -1)
+            aplicar(janela_pares, deltas[saiu][1], -1)
+
+        if (ultimo - fim) % PASSO_BUCKETS:
+            continue
+        rotulo = {
+            "Start": (inicio + (fim - JANELA_BUCKETS + 1) * passo).isoformat(),
+            "End": (inicio + (fim + 1) * passo).isoformat(),
+        }
+        exportar_janela(janela_freq, janela_pares, vocab, limitar_nos, rotulo, linhas_nos, linhas_arestas)
+        n_janelas += 1
+
+    os.makedirs(outdir, exist_ok=True)
+    nodes_path = os.path.join(outdir, f"nodes_{rede}_temporal.csv")
+    edges_path = os.path.join(outdir, f"edges_{rede}_temporal.csv")
+    pd.DataFrame(linhas_nos, columns=["Start", "End", "Id", "Label", "Frequency"]).to_csv(
+        nodes_path, index=False, encoding="utf-8"
+    )
+    pd.DataFrame(linhas_arestas, columns=["Start", "End", "Source", "Target", "Weight"]).to_csv(
+        edges_path, index=False, encoding="utf-8"
+    )
+    print(f"[OK] Rede temporal de {rede}: {n_janelas} janelas de {JANELA_BUCKETS} x {TAMANHO_BUCKET}")
+    print(f"     nós: {nodes_path} ({len(linhas_nos)})")
+    print(f"     arestas: {edges_path} ({len(linhas_arestas)})")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    pasta_entrada = os.path.join(script_dir, PASTA_ENTRADA)
+    outdir = os.path.join(script_dir, PASTA_SAIDA)
+
+    if "hashtag" in REDES:
+        coluna = "hashtags_sem_genericas" if REMOVER_GENERICAS else "hashtags"
+        df = ler_com_hashtags(pasta_entrada, ["created_at"], ARQUIVO_ENTRADA, (coluna,))
+        tokens = codificar(df[coluna])
+        gerar_rede_temporal(tokens, df["created_at"], "hashtag", contar_repeticoes=True,
+                            limitar_nos=False, outdir=outdir)
+
+    if "palavra" in REDES:
+        # o armazém de tokens tem uma linha por post limpo, na mesma ordem dos dados limpos
+        created_at = ler_dados_limpos(pasta_entrada, ["created_at"], ARQUIVO_ENTRADA)["created_at"]
+        tokens = carregar_tokens(pasta_entrada)
+        if len(tokens) != len(created_at):
+            raise ValueError("Armazém de tokens e dados limpos com números de posts diferentes: rode a limpeza de novo.")
+        if REMOVER_GENERICAS:
+            tokens = tokens.filtrar(np.array([w not in TERMOS_GENERICOS for w in tokens.vocab], dtype=bool))
+        gerar_rede_temporal(tokens, created_at, "palavra", contar_repeticoes=False,
+                            limitar_nos=True, outdir=outdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import heapq
+
+# Space-Saving (Metwally et al.): no máximo `capacidade` contadores.
+#   Cada item guardado tem estimativa e erro (o que herdou do contador que substituiu), com
+#   estimativa - erro <= real <= estimativa. Um item fora do sketch tem real <= maximo_fora
+#   (o menor contador, ou 0 se o sketch não chegou a encher). Esses limites são por item e não
+#   crescem com o total visto, ao contrário do pior caso W / capacidade.
+
+class SpaceSaving:
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self.total = 0
+        self._contadores = {}   # item -> [estimativa, erro]
+        self._heap = []         # (estimativa, item) com entradas obsoletas descartadas na hora
+
+    def _substituir_minimo(self):
+        while True:
+            estimativa, item = heapq.heappop(self._heap)
+            atual = self._contadores.get(item)
+            if atual is not None and atual[0] == estimativa:
+                del self._contadores[item]
+                return estimativa
+
+    def adicionar(self, itens, pesos=None):
+        # versão com peso: um lote já agregado (item, contagem) mantém os mesmos limites
+        if pesos is None:
+            pesos = [1] * len(itens)
+        for item, peso in zip(itens, pesos):
+            peso = int(peso)
+            self.total += peso
+            contador = self._contadores.get(item)
+            if contador is None:
+                erro = self._substituir_minimo() if len(self._contadores) >= self.capacidade else 0
+                contador = self._contadores[item] = [erro, erro]
+            contador[0] += peso
+            heapq.heappush(self._heap, (contador[0], item))
+        if len(self._heap) > 4 * self.capacidade:
+            self._heap = [(c[0], i) for i, c in self._contadores.items()]
+            heapq.heapify(self._heap)
+
+    @property
+    def maximo_fora(self) -> int:
+        if len(self._contadores) < self.capacidade:
+            return 0
+        return min(c[0] for c in self._contadores.values())
+
+    def itens(self) -> list[tuple]:
+        # (item, estimativa, erro), da maior estimativa para a menor
+        return sorted(
+            ((i, c[0], c[1]) for i, c in self._contadores.items()),
+            key=lambda x: (-x[1], x[0]),
+        )
+
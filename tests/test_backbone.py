@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backbone import alfa_disparidade, escore_ruido, filtrar_backbone
+
+# triângulo A-B 3, A-C 1, B-C 1: n = 10, forças A = 4, B = 4, C = 2
+TRIANGULO = pd.DataFrame({"Source": ["A", "A", "B"], "Target": ["B", "C", "C"], "Weight": [3, 1, 1]})
+
+
+def test_escore_ruido_a_mao():
+    escore, desvio = escore_ruido(TRIANGULO)
+    # A-B: kappa = 10 / 16, escore = (1.875 - 1) / (1.875 + 1)
+    # prior: média 0.16, variância 4*4*6*6 / (10**4 * 9) = 0.0064 -> beta(3.2, 23.52)
+    # posterior com nij = 3: p = 6.2 / 36.72, var(nij) = 10 p (1 - p)
+    # d = 1/16 - 10 * 8 / 256 = -0.25 -> var(escore) = var(nij) * (2 * (0.625 - 0.75) / 2.875**2)**2
+    p = 6.2 / 36.72
+    assert escore[0] == pytest.approx(0.875 / 2.875)
+    assert desvio[0] == pytest.approx(np.sqrt(10 * p * (1 - p) * (0.25 / 2.875 ** 2) ** 2))
+
+
+def test_alfa_disparidade_a_mao():
+    # A-B: (1 - 3/4)^1 nas duas pontas; A-C e B-C: C divide a força ao meio, (1 - 1/2)^1
+    assert alfa_disparidade(TRIANGULO) == pytest.approx([0.25, 0.5, 0.5])
+
+
+def test_filtrar_backbone_disparidade():
+    assert filtrar_backbone(TRIANGULO, "disparidade", 0.3)[["Source", "Target"]].values.tolist() == [["A", "B"]]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import rede_palavra_palavra as rede
+from armazem_tokens import codificar
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    # posts com palavras distintas de um vocabulário de cauda longa; cortes baixos para haver pares
+    monkeypatch.setattr(rede, "MIN_FREQ_PALAVRA", 3)
+    monkeypatch.setattr(rede, "MIN_PESO_ARESTA", 2)
+    monkeypatch.setattr(rede, "MAX_NOS", 40)
+    rng = np.random.default_rng(7)
+    vocab = [f"w{i:03d}" for i in range(150)]
+    pesos = 1.0 / np.arange(1, len(vocab) + 1)
+    posts = [
+        rng.choice(vocab, size=rng.integers(1, 9), replace=False, p=pesos / pesos.sum()).tolist()
+        for _ in range(600)
+    ]
+    return codificar(posts)
+
+
+def test_esparso_igual_ao_counter(tokens):
+    assert rede.contar_esparso(tokens) == rede.contar_counter(tokens)
+
+
+def test_janela_maior_que_os_posts_igual_ao_counter(tokens, monkeypatch):
+    # com palavras distintas e a janela cobrindo o post inteiro, cada par conta uma vez por post
+    monkeypatch.setattr(rede, "JANELA_K", 10)
+    monkeypatch.setattr(rede, "PESO_POR_DISTANCIA", False)
+    assert rede.contar_janela(tokens) == rede.contar_counter(tokens)
+
+
+def test_disco_com_runs_igual_ao_counter(tokens, monkeypatch, tmp_path):
+    # limite de pares baixo e blocos pequenos: várias runs em disco e a mescla no fim
+    monkeypatch.setattr(rede, "LIMITE_PARES_MEMORIA", 200)
+    monkeypatch.setattr(rede, "BLOCO_POSTS_DISCO", 64)
+    monkeypatch.setattr(rede, "PASTA_TEMP_DISCO", str(tmp_path))
+    assert rede.contar_disco(tokens) == rede.contar_counter(tokens)
+    assert not list(tmp_path.iterdir())
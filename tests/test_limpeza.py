@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import dados_limpos
+import limpeza_preparacao_dataset as limpeza
+from armazem_tokens import carregar_armazem
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSTS = os.path.join(RAIZ, "posts-bbb26.csv")
+
+
+def limpar(monkeypatch, entrada, saida, **constantes) -> str:
+    # roda a limpeza sobre `entrada` gravando em `saida` e devolve o cleaned_posts.csv
+    constantes = {"FORMATO_SAIDA": "csv", "MODO_STREAMING": False, "MODO_INCREMENTAL": False, **constantes}
+    monkeypatch.setattr(limpeza, "ARQUIVO_ENTRADA", str(entrada))
+    monkeypatch.setattr(limpeza, "PASTA_SAIDA", str(saida))
+    for nome, valor in constantes.items():
+        monkeypatch.setattr(limpeza, nome, valor)
+    limpeza.main()
+    with open(os.path.join(saida, dados_limpos.ARQUIVO_CSV), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_streaming_igual_ao_completo(monkeypatch, tmp_path):
+    completo = limpar(monkeypatch, POSTS, tmp_path / "completo")
+    streaming = limpar(monkeypatch, POSTS, tmp_path / "streaming", MODO_STREAMING=True, TAMANHO_CHUNK=97)
+    assert streaming == completo
+
+    a, b = carregar_armazem(str(tmp_path / "completo")), carregar_armazem(str(tmp_path / "streaming"))
+    assert a.vocab == b.vocab
+    assert np.array_equal(a.ids, b.ids) and np.array_equal(a.offsets, b.offsets)
+
+
+def test_incremental_igual_a_refazer(monkeypatch, tmp_path):
+    # quatro coletas anexadas ao CSV bruto, cada uma com posts repetidos dela e da anterior; a
+    # janela cobre a amostra toda, então nenhum repetido é esquecido entre as coletas
+    monkeypatch.setattr(limpeza, "JANELA_ATRASO_HORAS", 24 * 365)
+    df = pd.read_csv(POSTS, dtype=str, keep_default_na=False)
+    n = len(df)
+    partes = [df.iloc[i * n // 4:(i + 1) * n // 4] for i in range(4)]
+    bruto = tmp_path / "bruto.csv"
+    for i, parte in enumerate(partes):
+        repetidos = [parte.sample(15, random_state=i)] + ([partes[i - 1].tail(20)] if i else [])
+        pd.concat([parte, *repetidos]).to_csv(bruto, index=False, header=i == 0, mode="a")
+        incremental = limpar(monkeypatch, bruto, tmp_path / "incremental", MODO_INCREMENTAL=True)
+
+    refeito = limpar(monkeypatch, bruto, tmp_path / "refeito", MODO_INCREMENTAL=True)
+    assert incremental == refeito
+    assert len(pd.read_csv(tmp_path / "refeito" / dados_limpos.ARQUIVO_CSV)) < n
@@ -0,0 +1,29 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import metricas_grafo
+
+
+@pytest.fixture
+def grafo():
+    # preferential attachment com pesos inteiros, como as redes de coocorrência
+    G = nx.barabasi_albert_graph(120, 3, seed=7)
+    rng = np.random.default_rng(7)
+    for (u, v), w in zip(G.edges(), rng.integers(1, 20, G.number_of_edges())):
+        G[u][v]["weight"] = int(w)
+    return G
+
+
+def test_betweenness_paralela_igual_ao_networkx(grafo):
+    esperado = nx.betweenness_centrality(grafo, weight="weight", normalized=True)
+    paralela = metricas_grafo.betweenness_paralela(grafo, 2)
+    assert paralela.keys() == esperado.keys()
+    assert max(abs(paralela[n] - esperado[n]) for n in grafo) < 1e-12
+
+
+def test_betweenness_exata_com_workers(grafo):
+    betw, modo = metricas_grafo.betweenness(grafo, "exato", None, 0.05, 0.1, 7, n_workers=2)
+    esperado = nx.betweenness_centrality(grafo, weight="weight", normalized=True)
+    assert modo == "exato"
+    assert betw == pytest.approx(esperado, abs=1e-12)
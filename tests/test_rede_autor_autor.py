@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+import rede_autor_autor as rede
+
+
+def autores_sinteticos(n: int = 300, seed: int = 7) -> tuple[list[str], dict]:
+    # conjuntos de tamanhos variados sobre hashtags de cauda longa
+    rng = np.random.default_rng(seed)
+    tags = [f"#t{i:03d}" for i in range(120)]
+    pesos = 1.0 / np.arange(1, len(tags) + 1) ** 0.8
+    conjuntos = {
+        f"a{i:04d}": set(rng.choice(tags, size=rng.integers(1, 15), replace=False, p=pesos / pesos.sum()))
+        for i in range(n)
+    }
+    return sorted(conjuntos), conjuntos
+
+
+@pytest.mark.parametrize("min_shared, min_jaccard", [(2, 0.08), (1, 0.0), (0, 0.3), (3, 0.5), (0, 0.0)])
+def test_indice_igual_ao_exato(monkeypatch, min_shared, min_jaccard):
+    monkeypatch.setattr(rede, "MIN_SHARED_HASHTAGS", min_shared)
+    monkeypatch.setattr(rede, "MIN_JACCARD", min_jaccard)
+    autores, conjuntos = autores_sinteticos()
+    exato = sorted(rede.similares_exato(autores, conjuntos))
+    assert exato
+    assert sorted(rede.similares_indice(autores, conjuntos)) == exato